@@ -1,13 +1,72 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-from matplotlib.patches import Arc, Circle, Wedge, FancyBboxPatch, Rectangle
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.patches import Circle, Wedge, FancyBboxPatch, Rectangle, PathPatch
+from matplotlib.path import Path
+from matplotlib.collections import LineCollection, PatchCollection
 import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+import base64
 import io
+import json
+import math
 import zipfile
 import os
+import shutil
+import struct
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from dataclasses import dataclass, field
 import streamlit.components.v1 as components
 from matplotlib.colors import to_rgba, to_rgb, LinearSegmentedColormap
+from matplotlib import font_manager
+from matplotlib.font_manager import FontProperties
+
+# Optional: Numba JIT-compiles the segment polyline kernel; without it the segments
+# are sampled with the vectorized arc_vertices (the kernel's loop is slow as plain Python)
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# Cached color parsing: the same few hex strings are parsed for every rendered frame
+@lru_cache(maxsize=256)
+def _rgb(color):
+    """Returns the (r, g, b) float tuple for a Matplotlib color spec."""
+    return to_rgb(color)
+
+
+@lru_cache(maxsize=256)
+def _rgba(color):
+    """Returns the (r, g, b, a) float tuple for a Matplotlib color spec."""
+    return to_rgba(color)
+
+
+# Cached fonts for the text labels, so each frame skips the font lookup
+_font_cache = {}
+_ttf_cache = {}
+
+
+def get_font(size, weight='bold'):
+    """Returns a shared Matplotlib FontProperties for the given size and weight."""
+    key = (size, weight)
+    fp = _font_cache.get(key)
+    if fp is None:
+        fp = _font_cache[key] = FontProperties(weight=weight, size=size)
+    return fp
+
+
+def get_ttf_font(size):
+    """Returns a shared Pillow bold font (DejaVu Sans Bold, as in Matplotlib) in pixels."""
+    size = max(1, round(size))
+    font = _ttf_cache.get(size)
+    if font is None:
+        font_path = font_manager.findfont(FontProperties(family='DejaVu Sans', weight='bold'))
+        font = _ttf_cache[size] = ImageFont.truetype(font_path, size)
+    return font
 
 
 # Helper function to lighten/darken a color (not used in D3.js, but kept for Matplotlib if needed elsewhere)
@@ -17,9 +76,9 @@ def adjust_lightness(color, amount=0.5):
     amount > 1.0 brightens, amount < 1.0 darkens.
     """
     try:
-        c = to_rgb(color)
+        c = _rgb(color)
     except ValueError:
-        c = to_rgba(color)[:3] # Handle rgba input too, take only rgb parts
+        c = _rgba(color)[:3] # Handle rgba input too, take only rgb parts
     c = np.array(c)
     # This is a simple linear adjustment; for more perceptual lightness, convert to HSL/HSV
     if amount >= 1.0: # Lighten
@@ -28,9 +87,148 @@ def adjust_lightness(color, amount=0.5):
         return tuple(c * amount)
 
 
-# Function to draw the ROUND gauge and return it as a BytesIO object (Matplotlib-based)
-def create_gauge_image(
-    value: int,
+# Helper function to sample circular arcs into polylines for a single LineCollection
+def arc_vertices(center_x, center_y, radius, theta1_deg, theta2_deg, max_step_deg=2.0):
+    """
+    Samples one or more arcs into polyline vertices.
+    Like Matplotlib's Arc, each arc runs counter-clockwise from theta1 to theta2
+    (theta2 is unwrapped to within 360 degrees of theta1).
+    theta1_deg/theta2_deg may be scalars or equal-length arrays; returns an array
+    of shape (num_arcs, samples_per_arc, 2).
+    """
+    theta1 = np.atleast_1d(np.asarray(theta1_deg, dtype=float))
+    theta2 = np.atleast_1d(np.asarray(theta2_deg, dtype=float))
+    n_turns = (theta2 - theta1) / 360
+    nearest_turn = np.rint(n_turns)
+    is_full_circle = (nearest_turn != 0) & (np.abs(n_turns - nearest_turn) <= 1e-12)
+    spans = np.where(is_full_circle, 360.0, (theta2 - theta1) - 360 * np.floor(n_turns))
+    max_span = float(spans.max()) if spans.size else 0.0
+    samples_per_arc = max(2, int(np.ceil(max_span / max_step_deg)) + 1)
+    t = np.linspace(0.0, 1.0, samples_per_arc)
+    angles = np.deg2rad(theta1[:, None] + spans[:, None] * t[None, :])
+    return np.stack(
+        (center_x + radius * np.cos(angles), center_y + radius * np.sin(angles)),
+        axis=-1
+    )
+
+
+# Helper function to build a polyline Path for one arc (replaces Matplotlib's Arc patch)
+def arc_path(center_x, center_y, radius, theta1_deg, theta2_deg):
+    """
+    Returns a Path through the arc_vertices samples of a single arc, so it is drawn
+    as a plain polyline instead of Arc's per-draw bezier approximation.
+    """
+    return Path(arc_vertices(center_x, center_y, radius, theta1_deg, theta2_deg)[0])
+
+
+# Helper function to sample every segment of a segmented ROUND gauge into polylines
+if njit is not None:
+    @njit(cache=True)
+    def _segment_polylines_kernel(cx, cy, r, theta1s, theta2s, samples_per_arc):
+        out = np.empty((theta1s.shape[0], samples_per_arc, 2))
+        for i in range(theta1s.shape[0]):
+            t1 = np.deg2rad(theta1s[i])
+            step = np.deg2rad(theta2s[i] - theta1s[i]) / (samples_per_arc - 1)
+            for j in range(samples_per_arc):
+                a = t1 + j * step
+                out[i, j, 0] = cx + r * np.cos(a)
+                out[i, j, 1] = cy + r * np.sin(a)
+        return out
+
+
+def gen_segment_polylines(cx, cy, r, theta1s, theta2s, max_step_deg=2.0):
+    """
+    Segment-only counterpart of arc_vertices: segments never wrap (theta2 >= theta1),
+    so the arcs are sampled directly by the Numba kernel. Without Numba it returns
+    arc_vertices' samples, which are the same. Returns an array of shape
+    (num_segments, samples_per_arc, 2).
+    """
+    if njit is None:
+        return arc_vertices(cx, cy, r, theta1s, theta2s, max_step_deg)
+    theta1s = np.ascontiguousarray(theta1s, dtype=np.float64)
+    theta2s = np.ascontiguousarray(theta2s, dtype=np.float64)
+    max_span = float((theta2s - theta1s).max()) if theta1s.size else 0.0
+    samples_per_arc = max(2, int(np.ceil(max_span / max_step_deg)) + 1)
+    return _segment_polylines_kernel(float(cx), float(cy), float(r), theta1s, theta2s, samples_per_arc)
+
+
+# Helper function to compute the start/end angles of every round gauge segment at once
+def segment_angles(gauge_start_angle_deg, single_segment_angle, segment_gap_deg, num_segments, fill_direction):
+    """
+    Returns (theta1, theta2) arrays in Matplotlib's counter-clockwise convention.
+    Segments are laid out from the start angle in the fill direction.
+    """
+    step = single_segment_angle + segment_gap_deg
+    sign = 1 if fill_direction == "counter-clockwise" else -1
+    starts = gauge_start_angle_deg + sign * np.arange(num_segments) * step
+    if sign > 0:
+        return starts, starts + single_segment_angle
+    return starts - single_segment_angle, starts
+
+
+# Reusable Matplotlib figures for the gauge renderers. Figures are shared between
+# calls, so rendering into them is serialized (Streamlit may run scripts concurrently).
+_figure_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def get_cached_figure(size_x, size_y, output_dpi, bg_color, aspect='auto'):
+    """
+    Returns a cached (fig, ax) pair for the given output size, DPI, background and aspect.
+    The axes fill the whole figure, so the rendered canvas is exactly size_x x size_y.
+    Limits, aspect and axis visibility are set once here; renderers only swap the
+    drawn artists (see clear_axes), so the transforms are never recomputed.
+    """
+    fig = Figure(figsize=(size_x / output_dpi, size_y / output_dpi), dpi=output_dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
+    fig.patch.set_facecolor(bg_color)
+    ax.set_facecolor(bg_color)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.set_aspect(aspect)
+    ax.axis('off')
+    return fig, ax
+
+
+# Helper function to remove the previous frame's artists from a cached axes
+def clear_axes(ax):
+    """
+    Removes the drawn patches, collections, lines and texts but keeps the axes
+    limits, aspect and styling (unlike ax.cla()).
+    """
+    for artist in [*ax.patches, *ax.collections, *ax.lines, *ax.texts]:
+        artist.remove()
+
+
+# Helper function to encode a Pillow image as PNG or JPEG
+def encode_image(img, image_format: str) -> io.BytesIO:
+    """
+    Encodes an RGB(A) Pillow image with Pillow's C encoders.
+    """
+    img = img.convert('RGB')
+    buf = io.BytesIO()
+    if image_format.lower() in ("jpeg", "jpg"):
+        img.save(buf, format="JPEG", quality=90, subsampling=2)
+    else:
+        img.save(buf, format=image_format.upper(), optimize=False)
+    return buf
+
+
+# Helper function to encode a rendered figure straight from the Agg buffer with Pillow
+def encode_figure(fig, image_format: str) -> io.BytesIO:
+    """
+    Renders the figure once and encodes its RGBA buffer as PNG or JPEG.
+    Avoids savefig's extra tight-bbox render pass.
+    """
+    fig.canvas.draw()
+    return encode_image(Image.fromarray(np.asarray(fig.canvas.buffer_rgba())), image_format)
+
+
+# Function to draw a batch of ROUND gauge frames with Pillow, reusing the static layer
+def create_gauge_frames_pil(
+    values,
     size_x: int,
     size_y: int,
     active_color: str,
@@ -51,26 +249,51 @@ def create_gauge_image(
     total_gauge_values: int = 100,
     is_3d: bool = False,
     gauge_value_color: str = "#FFFFFF",
-    gauge_name_color: str = "#FFFFFF"
-) -> io.BytesIO:
+    gauge_name_color: str = "#FFFFFF",
+    supersample: int = 3
+):
     """
-    Generates a single ROUND gauge image for a given value based on selected gauge type.
+    Yields (value, BytesIO) pairs of ROUND gauge images drawn with Pillow's ImageDraw primitives.
+    Produces the same layout as the Matplotlib renderer; the gauge is drawn at
+    'supersample' times the output size and downsampled for anti-aliasing.
+    The parts that do not depend on the value (background, inactive arc, and segments
+    whose state is the same in every requested frame) are drawn once and copied for
+    every frame; only the active part and the text are drawn per value. For 3D gauges
+    the shadow stacks are pre-baked once and the active one is revealed with a mask.
     """
-    fig, ax = plt.subplots(
-        figsize=(size_x / output_dpi, size_y / output_dpi), dpi=output_dpi
-    )
-    fig.patch.set_facecolor(bg_color)
-    ax.set_facecolor(bg_color)
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    ax.set_aspect('equal')
-    ax.axis('off')
+    ss = supersample
 
-    center_x, center_y = 0.5, 0.5
+    # Same geometry as the Matplotlib renderer, in (supersampled) pixels
     min_dim = min(size_x, size_y)
     outer_diameter_pixels = max(1, min_dim - gauge_thickness_pixels)
     radius = (outer_diameter_pixels / 2) / min_dim
-    gauge_line_width_points = gauge_thickness_pixels * (72.0 / output_dpi)
+    center_x, center_y = size_x * ss / 2, size_y * ss / 2
+    radius_px = radius * min_dim * ss
+    line_width_px = max(1, int(round(gauge_thickness_pixels * ss)))
+
+    def pil_angles(theta1, theta2):
+        # Matplotlib convention: counter-clockwise from theta1 to theta2 with y up.
+        # Pillow measures angles clockwise with y down, so the arc runs from -theta2 to -theta1
+        # (start normalized to [0, 360), which Pillow handles reliably for very thin arcs).
+        span = theta2 - theta1
+        span = 360.0 if (span != 0 and span % 360 == 0) else span % 360
+        return (-theta1 - span) % 360, span
+
+    def draw_caps(draw, theta1, theta2, color, cap, offset_x=0.0, offset_y=0.0):
+        x, y = center_x + offset_x, center_y + offset_y
+        for t in np.deg2rad([theta1, theta2]):
+            px, py = x + radius_px * np.cos(t), y - radius_px * np.sin(t)
+            draw.ellipse([px - cap, py - cap, px + cap, py + cap], fill=color)
+
+    def draw_arc(draw, theta1, theta2, color, round_caps, offset_x=0.0, offset_y=0.0):
+        start, span = pil_angles(theta1, theta2)
+        if span == 0:
+            return
+        x, y = center_x + offset_x, center_y + offset_y
+        outer = radius_px + line_width_px / 2
+        draw.arc([x - outer, y - outer, x + outer, y + outer], start, start + span, fill=color, width=line_width_px)
+        if round_caps:
+            draw_caps(draw, theta1, theta1 + span, color, line_width_px / 2, offset_x, offset_y)
 
     # Calculate sweep degrees
     if fill_direction == "counter-clockwise":
@@ -80,161 +303,447 @@ def create_gauge_image(
     if total_sweep_degrees_base == 0 and gauge_start_angle_deg == gauge_end_angle_deg:
         total_sweep_degrees_base = 360
 
-    current_fill_ratio = (
-        value / (total_gauge_values - 1.0)
-        if total_gauge_values > 1
-        else 0.0
-    )
+    values = list(values)
+
+    def fill_ratio(value):
+        return value / (total_gauge_values - 1.0) if total_gauge_values > 1 else 0.0
 
-    # Draw arcs (continuous or segmented)
+    # Static layer: background plus everything that does not depend on the value
+    static_img = Image.new('RGB', (size_x * ss, size_y * ss), bg_color)
+    static_draw = ImageDraw.Draw(static_img)
     if gauge_type == "continuous":
-        # Determine arc angles
         inactive_arc_theta1 = gauge_start_angle_deg if fill_direction == "counter-clockwise" else gauge_end_angle_deg
         inactive_arc_theta2 = gauge_end_angle_deg if fill_direction == "counter-clockwise" else gauge_start_angle_deg
-        if value > 0 and total_sweep_degrees_base > 0:
+        if is_3d:
+            # Pre-baked 3D shadow: both shadow stacks are drawn once per batch. The inactive
+            # stack goes into the static layer; the active stack is drawn for the full sweep
+            # and revealed per frame through a mask covering the active arc.
+            num_shadow_layers = 5
+            offset_px = 0.0005 * radius * min_dim * ss
+            shade_factors = 1 - 0.1 * np.arange(num_shadow_layers + 1)
+            inactive_shades = np.rint(np.outer(shade_factors, _rgb(inactive_color)) * 255).astype(int)
+            active_shades = np.rint(np.outer(shade_factors, _rgb(active_color)) * 255).astype(int)
             if fill_direction == "counter-clockwise":
-                current_angle_on_circle = gauge_start_angle_deg + (current_fill_ratio * total_sweep_degrees_base)
-                active_arc_theta1 = gauge_start_angle_deg
-                active_arc_theta2 = current_angle_on_circle
+                full_sweep_theta1, full_sweep_theta2 = gauge_start_angle_deg, gauge_start_angle_deg + total_sweep_degrees_base
             else:
-                current_angle_on_circle = gauge_start_angle_deg - (current_fill_ratio * total_sweep_degrees_base)
-                active_arc_theta1 = current_angle_on_circle
-                active_arc_theta2 = gauge_start_angle_deg
+                full_sweep_theta1, full_sweep_theta2 = gauge_start_angle_deg - total_sweep_degrees_base, gauge_start_angle_deg
+            active_shadow_img = Image.new('RGB', static_img.size)
+            active_shadow_alpha = Image.new('L', static_img.size)
+            active_shadow_draw = ImageDraw.Draw(active_shadow_img)
+            active_shadow_alpha_draw = ImageDraw.Draw(active_shadow_alpha)
+            for i in range(num_shadow_layers + 1):
+                draw_arc(static_draw, inactive_arc_theta1, inactive_arc_theta2, tuple(inactive_shades[i]), True, i * offset_px, i * offset_px)
+                draw_arc(active_shadow_draw, full_sweep_theta1, full_sweep_theta2, tuple(active_shades[i]), True, i * offset_px, i * offset_px)
+                draw_arc(active_shadow_alpha_draw, full_sweep_theta1, full_sweep_theta2, 255, True, i * offset_px, i * offset_px)
+            shadow_reach_px = line_width_px / 2 + num_shadow_layers * offset_px * 2 + ss
         else:
-            active_arc_theta1, active_arc_theta2 = gauge_start_angle_deg, gauge_start_angle_deg
-
-        # 3D shadow layers
-        if is_3d:
-            num_shadow_layers = 5
-            offset_factor = 0.0005 * radius
-            active_rgb = to_rgb(active_color)
-            inactive_rgb = to_rgb(inactive_color)
-            active_gradient_colors = [tuple(c * (1 - 0.1 * i) for c in active_rgb) for i in range(num_shadow_layers + 1)]
-            inactive_gradient_colors = [tuple(c * (1 - 0.1 * i) for c in inactive_rgb) for i in range(num_shadow_layers + 1)]
-            for i in range(num_shadow_layers, -1, -1):
-                ox = i * offset_factor
-                oy = i * offset_factor
-                ax.add_patch(Arc(
-                    (center_x + ox, center_y - oy),
-                    width=2 * radius,
-                    height=2 * radius,
-                    angle=0,
-                    theta1=inactive_arc_theta1,
-                    theta2=inactive_arc_theta2,
-                    color=inactive_gradient_colors[i],
-                    linewidth=gauge_line_width_points,
-                    capstyle='round',
-                    zorder=i
-                ))
-                if value > 0 and total_sweep_degrees_base > 0:
-                    ax.add_patch(Arc(
-                        (center_x + ox, center_y - oy),
-                        width=2 * radius,
-                        height=2 * radius,
-                        angle=0,
-                        theta1=active_arc_theta1,
-                        theta2=active_arc_theta2,
-                        color=active_gradient_colors[i],
-                        linewidth=gauge_line_width_points,
-                        capstyle='round',
-                        zorder=i + 0.5
-                    ))
-        # Main arcs
-        ax.add_patch(Arc(
-            (center_x, center_y),
-            width=2 * radius,
-            height=2 * radius,
-            angle=0,
-            theta1=inactive_arc_theta1,
-            theta2=inactive_arc_theta2,
-            color=inactive_color,
-            linewidth=gauge_line_width_points,
-            capstyle='round',
-            zorder=100
-        ))
-        if value > 0 and total_sweep_degrees_base > 0:
-            ax.add_patch(Arc(
-                (center_x, center_y),
-                width=2 * radius,
-                height=2 * radius,
-                angle=0,
-                theta1=active_arc_theta1,
-                theta2=active_arc_theta2,
-                color=active_color,
-                linewidth=gauge_line_width_points,
-                capstyle='round',
-                zorder=101
-            ))
-
+            draw_arc(static_draw, inactive_arc_theta1, inactive_arc_theta2, inactive_color, True)
     elif gauge_type == "segmented":
         total_effective_sweep = total_sweep_degrees_base - (num_segments * segment_gap_deg)
         single_segment_angle = max(0, total_effective_sweep / num_segments)
-        num_active_segments = int(round(current_fill_ratio * num_segments))
-        current_segment_angle = gauge_start_angle_deg
+        segment_theta1, segment_theta2 = segment_angles(
+            gauge_start_angle_deg, single_segment_angle, segment_gap_deg, num_segments, fill_direction
+        )
+        # Segments that are active in every requested frame go into the static layer as active
+        always_active_segments = min(
+            (int(round(fill_ratio(value) * num_segments)) for value in values), default=0
+        )
         for i in range(num_segments):
-            segment_color = active_color if i < num_active_segments else inactive_color
-            if fill_direction == "counter-clockwise":
-                t1 = current_segment_angle
-                t2 = current_segment_angle + single_segment_angle
-            else:
-                t1 = current_segment_angle - single_segment_angle
-                t2 = current_segment_angle
-            ax.add_patch(Arc(
-                (center_x, center_y),
-                width=2 * radius,
-                height=2 * radius,
-                angle=0,
-                theta1=t1,
-                theta2=t2,
-                color=segment_color,
-                linewidth=gauge_line_width_points,
-                capstyle='butt'
-            ))
+            segment_color = active_color if i < always_active_segments else inactive_color
+            draw_arc(static_draw, segment_theta1[i], segment_theta2[i], segment_color, False)
+
+    # Text sizes are given in points, as in the Matplotlib renderer
+    points_to_px = output_dpi / 72.0 * ss
+    name_font = get_ttf_font(radius * 30 * points_to_px)
+    value_font = get_ttf_font(radius * 40 * points_to_px)
+
+    for value in values:
+        img = static_img.copy()
+        draw = ImageDraw.Draw(img)
+        current_fill_ratio = fill_ratio(value)
+
+        if gauge_type == "continuous":
+            draw_active = value > 0 and total_sweep_degrees_base > 0
             if fill_direction == "counter-clockwise":
-                current_segment_angle += single_segment_angle + segment_gap_deg
+                active_arc_theta1 = gauge_start_angle_deg
+                active_arc_theta2 = gauge_start_angle_deg + (current_fill_ratio * total_sweep_degrees_base)
             else:
-                current_segment_angle -= single_segment_angle + segment_gap_deg
-
-    # Add Gauge Name text if requested
-    if show_name and gauge_name:
-        ax.text(
-            center_x,
-            center_y + radius * 0.2,
-            gauge_name,
-            ha='center', va='center',
-            color=gauge_name_color,
-            fontsize=radius * 30,
-            weight='bold',
-            zorder=120
-        )
+                active_arc_theta1 = gauge_start_angle_deg - (current_fill_ratio * total_sweep_degrees_base)
+                active_arc_theta2 = gauge_start_angle_deg
+
+            # 3D shadow: reveal the pre-baked active shadow stack over the active range only
+            if is_3d:
+                if draw_active:
+                    reveal = Image.new('L', img.size)
+                    reveal_draw = ImageDraw.Draw(reveal)
+                    start, span = pil_angles(active_arc_theta1, active_arc_theta2)
+                    reach = radius_px + shadow_reach_px
+                    reveal_draw.pieslice([center_x - reach, center_y - reach, center_x + reach, center_y + reach], start, start + span, fill=255)
+                    draw_caps(reveal_draw, active_arc_theta1, active_arc_theta1 + span, 255, shadow_reach_px)
+                    img.paste(active_shadow_img, mask=ImageChops.multiply(reveal, active_shadow_alpha))
+                draw_arc(draw, inactive_arc_theta1, inactive_arc_theta2, inactive_color, True)
+
+            if draw_active:
+                draw_arc(draw, active_arc_theta1, active_arc_theta2, active_color, True)
+
+        elif gauge_type == "segmented":
+            # Remaining active segments are drawn over the pre-drawn inactive ones with identical geometry
+            num_active_segments = int(round(current_fill_ratio * num_segments))
+            for i in range(always_active_segments, min(num_active_segments, num_segments)):
+                draw_arc(draw, segment_theta1[i], segment_theta2[i], active_color, False)
+
+        # Add Gauge Name text if requested
+        if show_name and gauge_name:
+            draw.text(
+                (center_x, center_y - radius * 0.2 * min_dim * ss),
+                gauge_name,
+                fill=gauge_name_color,
+                font=name_font,
+                anchor='mm'
+            )
+
+        # Add Gauge Value text if requested
+        if show_value:
+            val_y = center_y if not (show_name and gauge_name) else center_y + radius * 0.1 * min_dim * ss
+            draw.text(
+                (center_x, val_y),
+                f"{value}",
+                fill=gauge_value_color,
+                font=value_font,
+                anchor='mm'
+            )
+
+        if ss > 1:
+            img = img.reduce(ss)
+        buf = encode_image(img, image_format)
+        buf.seek(0)
+        yield value, buf
 
-    # Add Gauge Value text if requested
-    if show_value:
-        val_y = center_y if not (show_name and gauge_name) else center_y - radius * 0.1
-        ax.text(
-            center_x,
-            val_y,
-            f"{value}",
-            ha='center', va='center',
-            color=gauge_value_color,
-            fontsize=radius * 40,
-            weight='bold',
-            zorder=120
+
+# Function to draw the ROUND gauge directly with Pillow and return it as a BytesIO object
+def create_gauge_image_pil(value: int, *args, **kwargs) -> io.BytesIO:
+    """
+    Generates a single ROUND gauge image with Pillow (see create_gauge_frames_pil).
+    """
+    _, buf = next(create_gauge_frames_pil([value], *args, **kwargs))
+    return buf
+
+
+# Function to draw the ROUND gauge and return it as a BytesIO object (Matplotlib-based)
+def create_gauge_image(
+    value: int,
+    size_x: int,
+    size_y: int,
+    active_color: str,
+    inactive_color: str,
+    bg_color: str,
+    gauge_name: str,
+    show_name: bool,
+    show_value: bool,
+    image_format: str,  # "png" or "jpeg"
+    gauge_thickness_pixels: int,
+    gauge_start_angle_deg: int,
+    gauge_end_angle_deg: int,
+    fill_direction: str,
+    output_dpi: int,
+    gauge_type: str,
+    num_segments: int = 50,
+    segment_gap_deg: float = 2.0,
+    total_gauge_values: int = 100,
+    is_3d: bool = False,
+    gauge_value_color: str = "#FFFFFF",
+    gauge_name_color: str = "#FFFFFF",
+    renderer: str = "matplotlib"  # "matplotlib" or "pillow"
+) -> io.BytesIO:
+    """
+    Generates a single ROUND gauge image for a given value based on selected gauge type.
+    Drawn with Matplotlib by default; pass renderer="pillow" to draw PNG/JPEG output
+    with the faster Pillow renderer (create_gauge_image_pil) instead.
+    """
+    if renderer == "pillow" and image_format.lower() in ("png", "jpeg", "jpg"):
+        return create_gauge_image_pil(
+            value, size_x, size_y, active_color, inactive_color, bg_color,
+            gauge_name, show_name, show_value, image_format, gauge_thickness_pixels,
+            gauge_start_angle_deg, gauge_end_angle_deg, fill_direction, output_dpi,
+            gauge_type, num_segments, segment_gap_deg, total_gauge_values, is_3d,
+            gauge_value_color, gauge_name_color
         )
 
-    plt.tight_layout(pad=0)
-    buf = io.BytesIO()
-    plt.savefig(
-        buf,
-        format=image_format,
-        bbox_inches='tight',
-        pad_inches=0,
-        transparent=False,
-        dpi=output_dpi
+    return render_value(
+        GaugeParams(
+            size_x, size_y, active_color, inactive_color, bg_color,
+            gauge_name, show_name, show_value, image_format, gauge_thickness_pixels,
+            gauge_start_angle_deg, gauge_end_angle_deg, fill_direction, output_dpi,
+            gauge_type, num_segments, segment_gap_deg, total_gauge_values, is_3d,
+            gauge_value_color, gauge_name_color
+        ),
+        value
     )
-    plt.close(fig)
+
+
+# Value-independent settings of a ROUND gauge, plus the geometry derived from them
+@dataclass
+class GaugeParams:
+    """
+    Everything the Matplotlib ROUND renderer needs except the value.
+    Derived geometry and colors (sweep, radius, line width, arc angles, 3D shadow
+    shades, segment polylines) are computed once in __post_init__, so every frame
+    of a batch can share them via render_value().
+    """
+    size_x: int
+    size_y: int
+    active_color: str
+    inactive_color: str
+    bg_color: str
+    gauge_name: str
+    show_name: bool
+    show_value: bool
+    image_format: str  # "png" or "jpeg"
+    gauge_thickness_pixels: int
+    gauge_start_angle_deg: int
+    gauge_end_angle_deg: int
+    fill_direction: str
+    output_dpi: int
+    gauge_type: str  # "continuous" or "segmented"
+    num_segments: int = 50
+    segment_gap_deg: float = 2.0
+    total_gauge_values: int = 100
+    is_3d: bool = False
+    gauge_value_color: str = "#FFFFFF"
+    gauge_name_color: str = "#FFFFFF"
+
+    # Derived in __post_init__
+    center_x: float = field(init=False, default=0.5)
+    center_y: float = field(init=False, default=0.5)
+    radius: float = field(init=False)
+    gauge_line_width_points: float = field(init=False)
+    total_sweep_degrees_base: float = field(init=False)
+    inactive_arc_theta1: float = field(init=False)
+    inactive_arc_theta2: float = field(init=False)
+    inactive_arc_path: Path = field(init=False, repr=False)
+    shadow_layer_offsets: np.ndarray = field(init=False, repr=False)
+    inactive_shadow_colors: np.ndarray = field(init=False, repr=False)
+    active_shadow_colors: np.ndarray = field(init=False, repr=False)
+    segment_vertices: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        min_dim = min(self.size_x, self.size_y)
+        outer_diameter_pixels = max(1, min_dim - self.gauge_thickness_pixels)
+        self.radius = (outer_diameter_pixels / 2) / min_dim
+        self.gauge_line_width_points = self.gauge_thickness_pixels * (72.0 / self.output_dpi)
+
+        # Calculate sweep degrees
+        ccw = self.fill_direction == "counter-clockwise"
+        if ccw:
+            self.total_sweep_degrees_base = (self.gauge_end_angle_deg - self.gauge_start_angle_deg + 360) % 360
+        else:
+            self.total_sweep_degrees_base = (self.gauge_start_angle_deg - self.gauge_end_angle_deg + 360) % 360
+        if self.total_sweep_degrees_base == 0 and self.gauge_start_angle_deg == self.gauge_end_angle_deg:
+            self.total_sweep_degrees_base = 360
+
+        self.inactive_arc_theta1 = self.gauge_start_angle_deg if ccw else self.gauge_end_angle_deg
+        self.inactive_arc_theta2 = self.gauge_end_angle_deg if ccw else self.gauge_start_angle_deg
+        self.inactive_arc_path = arc_path(
+            self.center_x, self.center_y, self.radius, self.inactive_arc_theta1, self.inactive_arc_theta2
+        )
+
+        # 3D shadow layer offsets and shades
+        num_shadow_layers = 5
+        layers = np.arange(num_shadow_layers + 1)
+        shade_factors = (1 - 0.1 * layers)[:, None]
+        self.shadow_layer_offsets = np.column_stack((layers, -layers)) * (0.0005 * self.radius)
+        self.inactive_shadow_colors = np.asarray(_rgb(self.inactive_color))[None, :] * shade_factors
+        self.active_shadow_colors = np.asarray(_rgb(self.active_color))[None, :] * shade_factors
+
+        # Segment polylines
+        self.segment_vertices = None
+        if self.gauge_type == "segmented":
+            total_effective_sweep = self.total_sweep_degrees_base - (self.num_segments * self.segment_gap_deg)
+            single_segment_angle = max(0, total_effective_sweep / self.num_segments)
+            segment_theta1, segment_theta2 = segment_angles(
+                self.gauge_start_angle_deg, single_segment_angle, self.segment_gap_deg, self.num_segments, self.fill_direction
+            )
+            self.segment_vertices = gen_segment_polylines(self.center_x, self.center_y, self.radius, segment_theta1, segment_theta2)
+
+    def fill_ratio(self, value):
+        return value / (self.total_gauge_values - 1.0) if self.total_gauge_values > 1 else 0.0
+
+    def active_arc_path(self, value):
+        """Returns the Path of the filled (active) arc for value, or None if nothing is filled."""
+        if value <= 0 or self.total_sweep_degrees_base <= 0:
+            return None
+        fill_sweep = self.fill_ratio(value) * self.total_sweep_degrees_base
+        if self.fill_direction == "counter-clockwise":
+            theta1, theta2 = self.gauge_start_angle_deg, self.gauge_start_angle_deg + fill_sweep
+        else:
+            theta1, theta2 = self.gauge_start_angle_deg - fill_sweep, self.gauge_start_angle_deg
+        return arc_path(self.center_x, self.center_y, self.radius, theta1, theta2)
+
+
+# Function to render one ROUND gauge frame with Matplotlib from precomputed GaugeParams
+def render_value(params: GaugeParams, value: int) -> io.BytesIO:
+    """
+    Renders the ROUND gauge for a single value and returns it as a BytesIO object.
+    """
+    p = params
+    with _figure_lock:
+        fig, ax = get_cached_figure(p.size_x, p.size_y, p.output_dpi, p.bg_color, 'equal')
+        clear_axes(ax)
+
+        # Draw arcs (continuous or segmented)
+        if p.gauge_type == "continuous":
+            active_arc_path = p.active_arc_path(value)
+
+            # 3D shadow layers, batched into one LineCollection (layer order preserved)
+            if p.is_3d:
+                shadow_arcs = []
+                shadow_colors = []
+                for i in range(len(p.shadow_layer_offsets)):
+                    shadow_arcs.append(p.inactive_arc_path.vertices + p.shadow_layer_offsets[i])
+                    shadow_colors.append(p.inactive_shadow_colors[i])
+                    if active_arc_path is not None:
+                        shadow_arcs.append(active_arc_path.vertices + p.shadow_layer_offsets[i])
+                        shadow_colors.append(p.active_shadow_colors[i])
+                ax.add_collection(LineCollection(
+                    shadow_arcs,
+                    colors=shadow_colors,
+                    linewidths=p.gauge_line_width_points,
+                    capstyle='round',
+                    zorder=0
+                ))
+            # Main arcs. add_artist skips add_patch's data-limit update; the limits are fixed anyway.
+            ax.add_artist(_round_arc_patch(p, p.inactive_arc_path, p.inactive_color, zorder=100))
+            if active_arc_path is not None:
+                ax.add_artist(_round_arc_patch(p, active_arc_path, p.active_color, zorder=101))
+
+        elif p.gauge_type == "segmented":
+            num_active_segments = int(round(p.fill_ratio(value) * p.num_segments))
+
+            # All segments go into one LineCollection instead of one Arc patch per segment
+            segment_colors = np.where(
+                np.arange(p.num_segments)[:, None] < num_active_segments,
+                _rgba(p.active_color),
+                _rgba(p.inactive_color)
+            )
+            ax.add_collection(LineCollection(
+                p.segment_vertices,
+                colors=segment_colors,
+                linewidths=p.gauge_line_width_points,
+                capstyle='butt'
+            ))
+
+        # Gauge Name and Value text, if requested
+        if p.show_name and p.gauge_name:
+            _add_round_name_text(ax, p)
+        if p.show_value:
+            _add_round_value_text(ax, p, value)
+
+        buf = encode_figure(fig, p.image_format)
     buf.seek(0)
     return buf
+
+
+# Function to render a batch of ROUND gauge frames with Matplotlib, blitting the static scene
+def render_values(params: GaugeParams, values) -> list:
+    """
+    Returns a list of (value, BytesIO) pairs, one per value, pixel-identical to render_value.
+    The background (plus the inactive arc of a continuous gauge) is drawn once and
+    snapshotted with copy_from_bbox; every frame restores that snapshot and draws
+    the remaining artists with draw_artist in render_value's zorder.
+    Segmented gauges redraw every segment per frame: an active segment blitted over
+    its anti-aliased inactive copy would not match render_value's edges.
+    3D gauges draw the active shadow below the inactive arc, which a snapshot
+    cannot express, so they fall back to render_value per frame.
+    """
+    p = params
+    if p.is_3d:
+        return [(value, render_value(p, value)) for value in values]
+
+    frames = []
+    with _figure_lock:
+        fig, ax = get_cached_figure(p.size_x, p.size_y, p.output_dpi, p.bg_color, 'equal')
+        clear_axes(ax)
+        canvas = fig.canvas
+
+        # Static scene
+        if p.gauge_type == "continuous":
+            ax.add_artist(_round_arc_patch(p, p.inactive_arc_path, p.inactive_color, zorder=100))
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+
+        for value in values:
+            canvas.restore_region(background)
+            dynamic_artists = []
+            if p.gauge_type == "continuous":
+                active_arc_path = p.active_arc_path(value)
+                if active_arc_path is not None:
+                    dynamic_artists.append(ax.add_artist(_round_arc_patch(p, active_arc_path, p.active_color, zorder=101)))
+            elif p.gauge_type == "segmented":
+                num_active_segments = int(round(p.fill_ratio(value) * p.num_segments))
+                segment_colors = np.where(
+                    np.arange(p.num_segments)[:, None] < num_active_segments,
+                    _rgba(p.active_color),
+                    _rgba(p.inactive_color)
+                )
+                dynamic_artists.append(ax.add_collection(LineCollection(
+                    p.segment_vertices,
+                    colors=segment_colors,
+                    linewidths=p.gauge_line_width_points,
+                    capstyle='butt'
+                ), autolim=False))
+            if p.show_name and p.gauge_name:
+                dynamic_artists.append(_add_round_name_text(ax, p))
+            if p.show_value:
+                dynamic_artists.append(_add_round_value_text(ax, p, value))
+
+            for artist in dynamic_artists:
+                ax.draw_artist(artist)
+            canvas.blit(fig.bbox)
+            buf = encode_image(Image.fromarray(np.asarray(canvas.buffer_rgba())), p.image_format)
+            buf.seek(0)
+            frames.append((value, buf))
+            for artist in dynamic_artists:
+                artist.remove()
+    return frames
+
+
+# Helpers shared by render_value and render_values
+def _round_arc_patch(p: GaugeParams, path, color, zorder):
+    return PathPatch(
+        path,
+        fill=False,
+        edgecolor=color,
+        linewidth=p.gauge_line_width_points,
+        capstyle='round',
+        zorder=zorder
+    )
+
+
+def _add_round_name_text(ax, p: GaugeParams):
+    return ax.text(
+        p.center_x,
+        p.center_y + p.radius * 0.2,
+        p.gauge_name,
+        ha='center', va='center',
+        color=p.gauge_name_color,
+        fontproperties=get_font(p.radius * 30),
+        zorder=120
+    )
+
+
+def _add_round_value_text(ax, p: GaugeParams, value):
+    val_y = p.center_y if not (p.show_name and p.gauge_name) else p.center_y - p.radius * 0.1
+    return ax.text(
+        p.center_x,
+        val_y,
+        f"{value}",
+        ha='center', va='center',
+        color=p.gauge_value_color,
+        fontproperties=get_font(p.radius * 40),
+        zorder=120
+    )
+
+
 # Function to draw the LINEAR gauge and return it as a BytesIO object (Matplotlib-based)
 def create_linear_gauge_image(
     value: int,
@@ -286,240 +795,1610 @@ def create_linear_gauge_image(
     Returns:
         io.BytesIO: A BytesIO object containing the generated image data.
     """
-    fig, ax = plt.subplots(figsize=(size_x / output_dpi, size_y / output_dpi), dpi=output_dpi)
-    fig.patch.set_facecolor(bg_color)
-    ax.set_facecolor(bg_color)
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    ax.axis('off')
+    with _figure_lock:
+        fig, ax = get_cached_figure(size_x, size_y, output_dpi, bg_color)
+        clear_axes(ax)
 
-    # Calculate padding based on the smaller dimension to ensure it's always relative
-    min_dim_pixels = min(size_x, size_y)
-    padding_pixels = min_dim_pixels * 0.1 # 10% padding
+        # Calculate padding based on the smaller dimension to ensure it's always relative
+        min_dim_pixels = min(size_x, size_y)
+        padding_pixels = min_dim_pixels * 0.1 # 10% padding
     
-    # Convert padding and thickness to relative units for Matplotlib's transform=ax.transAxes
-    padding_x_ratio = padding_pixels / size_x
-    padding_y_ratio = padding_pixels / size_y
+        # Convert padding and thickness to relative units for Matplotlib's transform=ax.transAxes
+        padding_x_ratio = padding_pixels / size_x
+        padding_y_ratio = padding_pixels / size_y
 
-    bar_thickness_ratio_x = linear_thickness_pixels / size_x
-    bar_thickness_ratio_y = linear_thickness_pixels / size_y
+        bar_thickness_ratio_x = linear_thickness_pixels / size_x
+        bar_thickness_ratio_y = linear_thickness_pixels / size_y
 
-    current_fill_ratio = value / (total_gauge_values - 1.0) if total_gauge_values > 1 else 0.0
+        current_fill_ratio = value / (total_gauge_values - 1.0) if total_gauge_values > 1 else 0.0
 
-    # For rounded tips, we'll use FancyBboxPatch for continuous, or rely on D3.js's rounded rects for segments.
-    # Matplotlib's Rectangle doesn't directly support rx/ry for rounded corners.
-    # We'll simulate rounded ends for continuous using FancyBboxPatch, and for segments,
-    # we'll use square ends in Matplotlib as it's simpler and D3.js handles rounded segments better.
+        # For rounded tips, we'll use FancyBboxPatch for continuous, or rely on D3.js's rounded rects for segments.
+        # Matplotlib's Rectangle doesn't directly support rx/ry for rounded corners.
+        # We'll simulate rounded ends for continuous using FancyBboxPatch, and for segments,
+        # we'll use square ends in Matplotlib as it's simpler and D3.js handles rounded segments better.
 
-    if orientation == "horizontal":
-        bar_height_ratio = bar_thickness_ratio_y
-        bar_width_ratio = 1 - 2 * padding_x_ratio
-        bar_x = padding_x_ratio
-        bar_y = 0.5 - bar_height_ratio / 2
+        if orientation == "horizontal":
+            bar_height_ratio = bar_thickness_ratio_y
+            bar_width_ratio = 1 - 2 * padding_x_ratio
+            bar_x = padding_x_ratio
+            bar_y = 0.5 - bar_height_ratio / 2
 
-        if num_segments > 1 and tip_style == "Straight": # Segmented horizontal (straight ends)
-            total_drawable_length_pixels = size_x * bar_width_ratio
-            total_gap_length_pixels = (num_segments - 1) * linear_segment_gap_pixels
-            single_segment_length_pixels = (total_drawable_length_pixels - total_gap_length_pixels) / num_segments
-            single_segment_length_ratio = single_segment_length_pixels / size_x
+            if num_segments > 1 and tip_style == "Straight": # Segmented horizontal (straight ends)
+                total_drawable_length_pixels = size_x * bar_width_ratio
+                total_gap_length_pixels = (num_segments - 1) * linear_segment_gap_pixels
+                single_segment_length_pixels = (total_drawable_length_pixels - total_gap_length_pixels) / num_segments
+                single_segment_length_ratio = single_segment_length_pixels / size_x
 
-            current_pos_x = bar_x
-            num_active_segments = int(round(current_fill_ratio * num_segments))
+                current_pos_x = bar_x
+                num_active_segments = int(round(current_fill_ratio * num_segments))
 
-            for i in range(num_segments):
-                color = active_color if i < num_active_segments else inactive_color
+                for i in range(num_segments):
+                    color = active_color if i < num_active_segments else inactive_color
+                    ax.add_patch(Rectangle(
+                        (current_pos_x, bar_y),
+                        single_segment_length_ratio,
+                        bar_height_ratio,
+                        facecolor=color,
+                        edgecolor='none',
+                        linewidth=0,
+                        transform=ax.transAxes
+                    ))
+                    current_pos_x += single_segment_length_ratio + (linear_segment_gap_pixels / size_x)
+            else: # Continuous horizontal
+                # Apply 3D effect for continuous linear gauges, batched into one PatchCollection
+                if is_3d:
+                    num_shadow_layers = 5
+                    offset_factor = 0.0005 * bar_height_ratio # Small offset relative to bar height
+                    layers = np.arange(num_shadow_layers + 1)
+                    shade_factors = (1 - 0.1 * layers)[:, None]
+                    inactive_gradient_colors = np.asarray(_rgb(inactive_color))[None, :] * shade_factors
+                    active_gradient_colors = np.asarray(_rgb(active_color))[None, :] * shade_factors
+
+                    active_width_ratio = current_fill_ratio * bar_width_ratio
+                    if value > 0 and active_width_ratio < (1 / size_x):
+                        active_width_ratio = (1 / size_x) * 2
+
+                    shadow_bars = []
+                    shadow_colors = []
+                    for i in layers:
+                        current_offset = i * offset_factor
+                        # Inactive shadow bar
+                        shadow_bars.append(Rectangle((bar_x + current_offset, bar_y - current_offset), bar_width_ratio, bar_height_ratio))
+                        shadow_colors.append(inactive_gradient_colors[i])
+                        # Active shadow bar
+                        if active_width_ratio > 0:
+                            shadow_bars.append(Rectangle((bar_x + current_offset, bar_y - current_offset), active_width_ratio, bar_height_ratio))
+                            shadow_colors.append(active_gradient_colors[i])
+                    ax.add_collection(PatchCollection(
+                        shadow_bars,
+                        facecolors=shadow_colors,
+                        edgecolors='none',
+                        linewidths=0,
+                        transform=ax.transAxes,
+                        zorder=0
+                    ))
+
+                # Draw the main (front) inactive bar
                 ax.add_patch(Rectangle(
-                    (current_pos_x, bar_y),
-                    single_segment_length_ratio,
+                    (bar_x, bar_y),
+                    bar_width_ratio,
                     bar_height_ratio,
-                    facecolor=color,
+                    facecolor=inactive_color,
                     edgecolor='none',
                     linewidth=0,
-                    transform=ax.transAxes
+                    transform=ax.transAxes,
+                    zorder=100
                 ))
-                current_pos_x += single_segment_length_ratio + (linear_segment_gap_pixels / size_x)
-        else: # Continuous horizontal
-            # Apply 3D effect for continuous linear gauges
-            if is_3d:
-                num_shadow_layers = 5
-                offset_factor = 0.0005 * bar_height_ratio # Small offset relative to bar height
+                # Draw the main (front) active bar
+                active_width_ratio = current_fill_ratio * bar_width_ratio
+                if value > 0 and active_width_ratio < (1 / size_x): # Ensure a minimum visible bar for value > 0
+                    active_width_ratio = (1 / size_x) * 2 # At least 2 pixels wide to be visible
+
+                if active_width_ratio > 0:
+                    ax.add_patch(Rectangle(
+                        (bar_x, bar_y),
+                        active_width_ratio,
+                        bar_height_ratio,
+                        facecolor=active_color,
+                        edgecolor='none',
+                        linewidth=0,
+                        transform=ax.transAxes,
+                        zorder=101
+                    ))
+    
+            # Text positioning for horizontal
+            if show_name and gauge_name:
+                ax.text(0.5, bar_y - 0.05, gauge_name, ha='center', va='bottom', color=gauge_name_color, fontproperties=get_font(bar_height_ratio * 1000, 'normal'), transform=ax.transAxes, zorder=120)
+            if show_value:
+                ax.text(bar_x + current_fill_ratio * bar_width_ratio, bar_y + bar_height_ratio + 0.05, f"{value}", ha='center', va='top', color=gauge_value_color, fontproperties=get_font(bar_height_ratio * 1200, 'normal'), transform=ax.transAxes, zorder=120)
+
+        else: # orientation == "vertical"
+            bar_width_ratio = bar_thickness_ratio_x
+            bar_height_ratio = 1 - 2 * padding_y_ratio
+            bar_x = 0.5 - bar_width_ratio / 2
+            bar_y = padding_y_ratio
+
+            if num_segments > 1 and tip_style == "Straight": # Segmented vertical (straight ends)
+                total_drawable_length_pixels = size_y * bar_height_ratio
+                total_gap_length_pixels = (num_segments - 1) * linear_segment_gap_pixels
+                single_segment_length_pixels = (total_drawable_length_pixels - total_gap_length_pixels) / num_segments
+                single_segment_length_ratio = single_segment_length_pixels / size_y
+
+                current_pos_y = bar_y
+                num_active_segments = int(round(current_fill_ratio * num_segments))
+
+                for i in range(num_segments):
+                    color = active_color if i < num_active_segments else inactive_color
+                    ax.add_patch(Rectangle(
+                        (bar_x, current_pos_y),
+                        bar_width_ratio,
+                        single_segment_length_ratio,
+                        facecolor=color,
+                        edgecolor='none',
+                        linewidth=0,
+                        transform=ax.transAxes
+                    ))
+                    current_pos_y += single_segment_length_ratio + (linear_segment_gap_pixels / size_y)
+            else: # Continuous vertical
+                # Apply 3D effect for continuous linear gauges, batched into one PatchCollection
+                if is_3d:
+                    num_shadow_layers = 5
+                    offset_factor = 0.0005 * bar_width_ratio # Small offset relative to bar width
+                    layers = np.arange(num_shadow_layers + 1)
+                    shade_factors = (1 - 0.1 * layers)[:, None]
+                    inactive_gradient_colors = np.asarray(_rgb(inactive_color))[None, :] * shade_factors
+                    active_gradient_colors = np.asarray(_rgb(active_color))[None, :] * shade_factors
+
+                    active_height_ratio = current_fill_ratio * bar_height_ratio
+                    if value > 0 and active_height_ratio < (1 / size_y):
+                        active_height_ratio = (1 / size_y) * 2
+
+                    shadow_bars = []
+                    shadow_colors = []
+                    for i in layers:
+                        current_offset = i * offset_factor
+                        # Inactive shadow bar
+                        shadow_bars.append(Rectangle((bar_x + current_offset, bar_y + bar_height_ratio - (bar_height_ratio + current_offset)), bar_width_ratio, bar_height_ratio))
+                        shadow_colors.append(inactive_gradient_colors[i])
+                        # Active shadow bar
+                        if active_height_ratio > 0:
+                            shadow_bars.append(Rectangle((bar_x + current_offset, bar_y + bar_height_ratio - active_height_ratio - current_offset), bar_width_ratio, active_height_ratio))
+                            shadow_colors.append(active_gradient_colors[i])
+                    ax.add_collection(PatchCollection(
+                        shadow_bars,
+                        facecolors=shadow_colors,
+                        edgecolors='none',
+                        linewidths=0,
+                        transform=ax.transAxes,
+                        zorder=0
+                    ))
+
+                # Draw inactive bar
+                ax.add_patch(Rectangle(
+                    (bar_x, bar_y),
+                    bar_width_ratio,
+                    bar_height_ratio,
+                    facecolor=inactive_color,
+                    edgecolor='none',
+                    linewidth=0,
+                    transform=ax.transAxes,
+                    zorder=100
+                ))
+                # Draw active bar
+                active_height_ratio = current_fill_ratio * bar_height_ratio
+                if value > 0 and active_height_ratio < (1 / size_y): # Ensure a minimum visible bar for value > 0
+                    active_height_ratio = (1 / size_y) * 2 # At least 2 pixels high to be visible
+
+                if active_height_ratio > 0:
+                    ax.add_patch(Rectangle(
+                        (bar_x, bar_y + bar_height_ratio - active_height_ratio), # Draw from bottom up for vertical fill
+                        bar_width_ratio,
+                        active_height_ratio,
+                        facecolor=active_color,
+                        edgecolor='none',
+                        linewidth=0,
+                        transform=ax.transAxes,
+                        zorder=101
+                    ))
+
+            # Text positioning for vertical
+            if show_name and gauge_name:
+                ax.text(bar_x - 0.05, 0.5, gauge_name, ha='right', va='center', rotation=90, color=gauge_name_color, fontproperties=get_font(bar_width_ratio * 1000, 'normal'), transform=ax.transAxes, zorder=120)
+            if show_value:
+                ax.text(bar_x + bar_width_ratio + 0.05, bar_y + bar_height_ratio - current_fill_ratio * bar_height_ratio, f"{value}", ha='left', va='center', color=gauge_value_color, fontproperties=get_font(bar_width_ratio * 1200, 'normal'), transform=ax.transAxes, zorder=120)
+
+        buf = encode_figure(fig, image_format)
+    buf.seek(0)
+    return buf
+
+
+# Function to render every gauge value into a ZIP archive, one batch of values per worker thread
+def create_gauge_zip(render_batch, filename_suffix: str, image_format: str, total_gauge_values: int = 100) -> io.BytesIO:
+    """
+    Renders values 0..total_gauge_values-1 and returns a ZIP of '<value>_<suffix>.<png|jpg>' images.
+    render_batch(values) returns (value, BytesIO) pairs, e.g. partial(render_values, params)
+    or partial(create_gauge_frames_pil, **kwargs). The values are split into contiguous
+    batches rendered in a thread pool (forking Streamlit's threaded server can deadlock):
+    Pillow's drawing and encoding run in parallel, Matplotlib batches take turns on _figure_lock.
+    """
+    values = range(total_gauge_values)
+    batch_size = max(1, math.ceil(total_gauge_values / (os.cpu_count() or 1)))
+    batches = [values[i:i + batch_size] for i in range(0, total_gauge_values, batch_size)]
+    with ThreadPoolExecutor(max_workers=len(batches) or 1) as pool:
+        frames = [frame for batch in pool.map(lambda batch: list(render_batch(batch)), batches) for frame in batch]
+
+    extension = "jpg" if image_format.lower() in ("jpeg", "jpg") else image_format.lower()
+    zip_buffer = io.BytesIO()
+    # PNG/JPEG frames are already compressed, so they are stored as-is
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zipf:
+        for value, frame in frames:
+            zipf.writestr(f"{value:02d}_{filename_suffix}.{extension}", frame.getvalue())
+    zip_buffer.seek(0)
+    return zip_buffer
+
+
+# Cached ROUND gauge rendering: revisiting a value with the same settings is a cache lookup
+@st.cache_data(max_entries=256, show_spinner=False)
+def _cached_gauge(**params) -> bytes:
+    """
+    Returns the encoded create_gauge_image output as bytes (ready for st.image or
+    st.download_button). All parameters are scalars/strings, so Streamlit hashes
+    them directly as the cache key.
+    """
+    return create_gauge_image(**params).getvalue()
+
+
+# Session-state keys the D3.js page is built from (the arguments of _build_gauge_html).
+# The gauge value is not one of them: it is pushed into the mounted page by
+# _GAUGE_VALUE_MESSENGER, so value-only reruns keep the same iframe.
+_GAUGE_HTML_KEYS = (
+    'bg_color',
+    'gauge_value_color',
+    'gauge_name',
+    'gauge_name_color',
+    'output_width',
+    'output_height',
+    'active_color',
+    'inactive_color',
+    'show_value',
+    'show_name',
+    'show_angle_markers',
+    'gauge_type',
+    'tip_style',
+    'gauge_thickness',
+    'start_angle',
+    'end_angle',
+    'fill_direction',
+    'num_segments',
+    'segment_gap_deg',
+    'linear_thickness',
+    'linear_orientation',
+    'linear_num_segments',
+    'linear_segment_gap_pixels',
+)
+
+
+# Numeric settings of the D3.js page, in the order they are packed into the binary
+# payload (little-endian float64 each, read back with a DataView in the page)
+_GAUGE_NUMERIC_PARAMS = (
+    'width',
+    'height',
+    'roundGaugeThickness',
+    'roundStartAngleRad',
+    'roundEndAngleRad',
+    'roundNumSegments',
+    'roundSegmentGapRad',
+    'linearThickness',
+    'linearNumSegments',
+    'linearSegmentGapPixels',
+)
+
+
+# Helper function to build the SVG gradients of the D3.js page
+def _gradient_defs_svg(active_color, inactive_color, linear_orientation):
+    """
+    Returns the <radialGradient>/<linearGradient> markup for the active and inactive
+    colors. Each gradient runs from a lighter (+100) over the base to a darker (-100)
+    shade of its color, which gives the gauges their 3D look.
+    """
+    if linear_orientation == "horizontal":
+        linear_axis = 'x1="0%" y1="0%" x2="0%" y2="100%"'
+    else:  # vertical
+        linear_axis = 'x1="0%" y1="0%" x2="100%" y2="0%"'
+
+    defs = []
+    for state, color in (("active", active_color), ("inactive", inactive_color)):
+        r, g, b = (round(c * 255) for c in _rgb(color))
+        light = f"rgb({min(255, r + 100)}, {min(255, g + 100)}, {min(255, b + 100)})"
+        mid = f"rgb({r}, {g}, {b})"
+        dark = f"rgb({max(0, r - 100)}, {max(0, g - 100)}, {max(0, b - 100)})"
+        stops = (
+            f'<stop offset="0%" stop-color="{light}"/>'
+            f'<stop offset="50%" stop-color="{mid}"/>'
+            f'<stop offset="100%" stop-color="{dark}"/>'
+        )
+        defs.append(f'<radialGradient id="{state}RadialGradient" cx="50%" cy="50%" r="70%" fx="35%" fy="35%">{stops}</radialGradient>')
+        defs.append(f'<linearGradient id="{state}LinearGradient" {linear_axis}>{stops}</linearGradient>')
+    return "".join(defs)
+
+
+# Helper function to build the debug angle markers (0, 90, 180, 270 degrees) of the round D3.js gauge
+def _angle_markers_svg(output_width, output_height, show_angle_markers):
+    """
+    Returns the markers as a static <g> in gauge-centered coordinates. The markers
+    only depend on the gauge size, so they are emitted once and toggled through
+    the group's visibility.
+    """
+    outer_radius = min(output_width, output_height) / 2 * 0.9
+    marker_radius = outer_radius * 0.8
+    text_offset = outer_radius * 0.15
+    markers = []
+    for angle_deg, text_dx, text_dy, text_anchor in (
+        (0, text_offset, 0, "start"),
+        (90, 0, -text_offset, "middle"),
+        (180, -text_offset, 0, "end"),
+        (270, 0, text_offset, "middle"),
+    ):
+        x = marker_radius * math.cos(math.radians(angle_deg))
+        y = marker_radius * math.sin(math.radians(angle_deg))
+        markers.append(f'<circle cx="{x:.3f}" cy="{y:.3f}" r="3" fill="red"/>')
+        markers.append(
+            f'<text class="angle-marker-text" x="{x + text_dx:.3f}" y="{y + text_dy:.3f}" '
+            f'text-anchor="{text_anchor}">{angle_deg}°</text>'
+        )
+    visibility = "visible" if show_angle_markers else "hidden"
+    return f'<g id="angle-markers" visibility="{visibility}">{"".join(markers)}</g>'
+
+
+# Static D3.js page for the live preview and bulk export. The numeric settings are
+# injected as a base64 float64 payload in place of __NUMERIC_PARAMS__, everything else
+# as a JSON payload in place of __PARAMS__ (see _build_gauge_html).
+_GAUGE_HTML_TEMPLATE = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Gauge Preview</title>
+        <script src="https://d3js.org/d3.v7.min.js"></script>
+        <style>
+            body {margin: 0; overflow: hidden; background-color: var(--bg-color);}
+            svg {display: block;}
+            .gauge-value-text {
+                font-family: sans-serif;
+                font-size: 40px; /* Fixed size for reliability */
+                font-weight: bold;
+                text-anchor: middle;
+                fill: var(--gauge-value-color);
+            }
+            .gauge-name-text {
+                font-family: sans-serif;
+                font-size: 30px; /* Fixed size for reliability */
+                font-weight: bold;
+                text-anchor: middle;
+                fill: var(--gauge-name-color);
+            }
+            .angle-marker-text {
+                font-family: sans-serif;
+                font-size: 12px;
+                fill: #ddd;
+                text-anchor: middle;
+                dominant-baseline: central;
+            }
+        </style>
+    </head>
+    <body>
+        <div id="gauge-container" style="width: {width}px; height: {height}px; margin: 0 auto;"></div>
+        <div id="d3-status-message" style="text-align: center; margin-top: 10px; font-weight: bold; color: #333;"></div>
+        <script id="gauge-params" type="application/json">__PARAMS__</script>
+        <script>
+            const container = d3.select("#gauge-container");
+            const {
+                activeColor, inactiveColor, showValue, showName,
+                gaugeName, backgroundColor, gaugeType, tipStyle, gaugeValueColor,
+                gaugeNameColor, roundFillDirection, linearOrientation, showAngleMarkers, gradientDefs, angleMarkersSvg
+            } = JSON.parse(document.getElementById("gauge-params").textContent);
+
+            // Numeric settings, unpacked from little-endian float64s in _GAUGE_NUMERIC_PARAMS order
+            const numericParams = new DataView(Uint8Array.from(atob("__NUMERIC_PARAMS__"), c => c.charCodeAt(0)).buffer);
+            const [
+                width, height, roundGaugeThickness, roundStartAngleRad, roundEndAngleRad,
+                roundNumSegments, roundSegmentGapRad, linearThickness, linearNumSegments, linearSegmentGapPixels
+            ] = Array.from({length: numericParams.byteLength / 8}, (_, i) => numericParams.getFloat64(8 * i, true));
+            const centerX = width / 2;
+            const centerY = height / 2;
+            const totalValues = 100;
+
+            // Colors used by the stylesheet
+            const rootStyle = document.documentElement.style;
+            rootStyle.setProperty("--bg-color", backgroundColor);
+            rootStyle.setProperty("--gauge-value-color", gaugeValueColor);
+            rootStyle.setProperty("--gauge-name-color", gaugeNameColor);
+
+
+            const EPSILON = 0.0001;
+
+            // Rounds an SVG coordinate to 2 decimals, which keeps the serialized frames small
+            const f2 = v => Math.round(v * 100) / 100;
+            const MIN_ACTIVE_ANGLE = Math.PI / 90; // 2 degrees, the smallest visible arc (value 1)
+
+            // Wraps a sweep angle into [0, 2*PI]
+            function normalizeSweep(sweep) {
+                if (sweep < -EPSILON) return sweep + 2 * Math.PI;
+                if (sweep > 2 * Math.PI + EPSILON) return sweep - 2 * Math.PI;
+                return sweep;
+            }
+
+            // Settings-only geometry of a round gauge, shared by initGauge and updateGauge
+            function roundGeometry() {
+                const outerRadius = Math.min(width, height) / 2 * 0.9;
+                const innerRadius = outerRadius * (1 - roundGaugeThickness);
+
+                const rawStartRad = roundStartAngleRad;
+                const rawEndRad = roundEndAngleRad;
+
+                // Full circle if start and end are the same, otherwise the sweep in the fill direction
+                const isFullCircle = Math.abs(rawStartRad - rawEndRad) < EPSILON;
+                const totalSweepMagnitude = isFullCircle
+                    ? 2 * Math.PI
+                    : normalizeSweep(roundFillDirection === "counter-clockwise" ? rawEndRad - rawStartRad : rawStartRad - rawEndRad);
+
+                const arcGenerator = d3.arc()
+                    .innerRadius(innerRadius)
+                    .outerRadius(outerRadius)
+                    .cornerRadius(tipStyle === "Rounded" ? (outerRadius - innerRadius) / 2 : 0)
+                    .digits(2); // Path coordinates with 2 decimals, like f2
+
+                return {outerRadius, innerRadius, rawStartRad, totalSweepMagnitude, arcGenerator};
+            }
+
+            // Swept angle of the active arc of a continuous round gauge for a value
+            function roundFilledSweep(currentValue, totalSweepMagnitude) {
+                if (currentValue === 0) return 0;
+                if (currentValue === 1 && totalSweepMagnitude > 0) return MIN_ACTIVE_ANGLE; // Show a sliver for value 1
+                return Math.min(1, currentValue / totalValues) * totalSweepMagnitude;
+            }
+
+            // Settings-only geometry of a linear gauge (bar extents, corner radii, segment length)
+            function linearGeometry() {
+                const padding = 20;
+                const currentRx = tipStyle === "Rounded" ? linearThickness / 2 : 0;
+                const currentRy = tipStyle === "Rounded" ? linearThickness / 2 : 0;
+                const totalBarLength = (linearOrientation === "horizontal" ? width : height) - 2 * padding;
+                const totalGapLength = linearNumSegments > 1 ? (linearNumSegments - 1) * linearSegmentGapPixels : 0;
+                let segmentLength = (totalBarLength - totalGapLength) / linearNumSegments;
+                if (segmentLength < 0) segmentLength = 0;
+
+                let xStart, yStart, xEnd, yEnd;
+                if (linearOrientation === "horizontal") {
+                    xStart = -width / 2 + padding;
+                    yStart = -linearThickness / 2;
+                    xEnd = width / 2 - padding;
+                    yEnd = linearThickness / 2;
+                } else { // vertical
+                    xStart = -linearThickness / 2;
+                    yStart = height / 2 - padding; // Top of the bar
+                    xEnd = linearThickness / 2;
+                    yEnd = -height / 2 + padding; // Bottom of the bar
+                }
+                return {padding, currentRx, currentRy, segmentLength, xStart, yStart, xEnd, yEnd};
+            }
+
+            // Layout derived from the settings (geometry plus per-segment tables), rebuilt
+            // only when one of the settings it depends on changes
+            let layoutCache = null;
+            let layoutKey = '';
+
+            function getLayout(gaugeType) {
+                const key = [
+                    gaugeType, width, height, tipStyle,
+                    roundGaugeThickness, roundStartAngleRad, roundEndAngleRad, roundFillDirection, roundNumSegments, roundSegmentGapRad,
+                    linearThickness, linearOrientation, linearNumSegments, linearSegmentGapPixels
+                ].join('|');
+                if (key === layoutKey) return layoutCache;
+
+                if (gaugeType === "Round" || gaugeType === "Round Segmented") {
+                    layoutCache = roundGeometry();
+                    if (gaugeType === "Round Segmented") {
+                        // [theta1, theta2] of every segment, in fill order
+                        const {rawStartRad, totalSweepMagnitude} = layoutCache;
+                        const gapRad = roundSegmentGapRad;
+                        const totalEffectiveSweep = totalSweepMagnitude - (roundNumSegments * gapRad);
+                        const singleSegmentAngle = totalEffectiveSweep / roundNumSegments;
+                        const segmentAngles = new Float64Array(2 * roundNumSegments);
+
+                        let currentSegmentStartAngle = rawStartRad;
+                        for (let i = 0; i < roundNumSegments; i++) {
+                            if (roundFillDirection === "counter-clockwise") {
+                                segmentAngles[2 * i] = currentSegmentStartAngle;
+                                segmentAngles[2 * i + 1] = currentSegmentStartAngle + singleSegmentAngle;
+                                currentSegmentStartAngle += (singleSegmentAngle + gapRad);
+                            } else {
+                                segmentAngles[2 * i] = currentSegmentStartAngle - singleSegmentAngle;
+                                segmentAngles[2 * i + 1] = currentSegmentStartAngle;
+                                currentSegmentStartAngle -= (singleSegmentAngle + gapRad);
+                            }
+                        }
+                        layoutCache.segmentAngles = segmentAngles;
+                        layoutCache.segmentSin = Float64Array.from(segmentAngles, Math.sin);
+                        layoutCache.segmentCos = Float64Array.from(segmentAngles, Math.cos);
+                    }
+                } else {
+                    layoutCache = linearGeometry();
+                    if (gaugeType === "Linear Segmented") {
+                        // Leading edge of every segment: x for horizontal, y for vertical (segments drawn downwards)
+                        const {padding, segmentLength} = layoutCache;
+                        const segmentPositions = new Float64Array(linearNumSegments);
+                        if (linearOrientation === "horizontal") {
+                            let currentPosition = -width / 2 + padding;
+                            for (let i = 0; i < linearNumSegments; i++) {
+                                segmentPositions[i] = currentPosition;
+                                currentPosition += segmentLength + linearSegmentGapPixels;
+                            }
+                        } else {
+                            let currentPosition = height / 2 - padding; // Start from top for vertical segments
+                            for (let i = 0; i < linearNumSegments; i++) {
+                                segmentPositions[i] = currentPosition - segmentLength;
+                                currentPosition -= (segmentLength + linearSegmentGapPixels);
+                            }
+                        }
+                        layoutCache.segmentPositions = segmentPositions;
+                    }
+                }
+                layoutKey = key;
+                return layoutCache;
+            }
+
+            // Path of one round segment. Square-tipped segments are written directly from the
+            // layout's sin/cos tables; rounded ones need d3.arc's corner rounding.
+            function segmentPath(i, arcGenerator) {
+                const {innerRadius, outerRadius, segmentAngles, segmentSin, segmentCos} = layoutCache;
+                const a0 = segmentAngles[2 * i];
+                const a1 = segmentAngles[2 * i + 1];
+                if (tipStyle === "Rounded" || !(a1 > a0) || a1 - a0 > 2 * Math.PI - EPSILON) {
+                    return arcGenerator({startAngle: a0, endAngle: a1});
+                }
+
+                // d3.arc's convention: angle 0 at 12 o'clock, clockwise, so (x, y) = (r*sin, -r*cos)
+                const s0 = segmentSin[2 * i], c0 = segmentCos[2 * i];
+                const s1 = segmentSin[2 * i + 1], c1 = segmentCos[2 * i + 1];
+                const largeArc = a1 - a0 > Math.PI ? 1 : 0;
+                const R = outerRadius, r = innerRadius;
+                return `M${f2(R * s0)},${f2(-R * c0)}A${f2(R)},${f2(R)},0,${largeArc},1,${f2(R * s1)},${f2(-R * c1)}` +
+                    `L${f2(r * s1)},${f2(-r * c1)}A${f2(r)},${f2(r)},0,${largeArc},0,${f2(r * s0)},${f2(-r * c0)}Z`;
+            }
+
+            // Sets several attributes with plain setAttribute calls (no D3 .attr() dispatch),
+            // numbers rounded with f2
+            function setAttrs(el, attrs) {
+                for (const name in attrs) {
+                    const value = attrs[name];
+                    el.setAttribute(name, typeof value === "number" ? f2(value) : value);
+                }
+                return el;
+            }
+
+            // Appends one SVG element with the given attributes to a layer selection
+            function appendShape(layer, tag, attrs) {
+                return layer.node().appendChild(setAttrs(document.createElementNS(d3.namespaces.svg, tag), attrs));
+            }
+
+            // Serializes attributes as markup, numbers rounded with f2
+            function attrString(attrs) {
+                let markup = "";
+                for (const name in attrs) {
+                    const value = attrs[name];
+                    markup += ` ${name}="${typeof value === "number" ? f2(value) : value}"`;
+                }
+                return markup;
+            }
+
+            // Creates the .seg elements for the given data as one markup string, inserted with a
+            // single insertAdjacentHTML, then binds each datum as __data__ with a D3 data join.
+            // attrs are shared by all segments, datumAttrs(d) returns the per-segment ones.
+            function appendSegments(layer, tag, data, attrs, datumAttrs) {
+                const sharedAttrs = attrString(attrs);
+                const parts = [];
+                for (const d of data) parts.push(`<${tag} class="seg"${sharedAttrs}${attrString(datumAttrs(d))}/>`);
+                layer.node().insertAdjacentHTML("beforeend", parts.join(""));
+                layer.selectAll(".seg").data(data);
+            }
+
+            // Appends the gauge name and value texts to the label layer (the value itself is set in updateGauge)
+            function drawLabels(labelLayer, valueX, valueY, nameX, nameY, valueAnchor, nameAnchor, baseline = null) {
+                if (showName && gaugeName) {
+                    labelLayer.append("text")
+                        .attr("class", "gauge-name-text")
+                        .attr("x", f2(nameX))
+                        .attr("y", f2(nameY))
+                        .attr("fill", gaugeNameColor)
+                        .attr("font-family", "sans-serif")
+                        .attr("font-size", "30px")
+                        .attr("font-weight", "bold")
+                        .attr("text-anchor", nameAnchor)
+                        .attr("dominant-baseline", baseline)
+                        .text(gaugeName);
+                }
+                if (showValue) {
+                    labelLayer.append("text")
+                        .attr("data-role", "value")
+                        .attr("class", "gauge-value-text")
+                        .attr("x", f2(valueX))
+                        .attr("y", f2(valueY))
+                        .attr("fill", gaugeValueColor)
+                        .attr("font-family", "sans-serif")
+                        .attr("font-size", "40px")
+                        .attr("font-weight", "bold")
+                        .attr("text-anchor", valueAnchor)
+                        .attr("dominant-baseline", baseline);
+                }
+            }
+
+            // The gradient <defs> (markup built in Python, see gradientDefs), parsed on first use
+            // and cloned into every SVG that draws a gauge
+            let gradientDefsNode = null;
+            function cloneGradientDefs() {
+                if (!gradientDefsNode) {
+                    gradientDefsNode = document.createElementNS(d3.namespaces.svg, "defs");
+                    gradientDefsNode.innerHTML = gradientDefs;
+                }
+                return gradientDefsNode.cloneNode(true);
+            }
+
+            // Builds everything that doesn't depend on the value, once per SVG:
+            // #bg-layer (inactive arc/bar, all segments), #fg-layer (active arc/bar) and
+            // #label-layer (angle markers, name, value text), in drawing order.
+            function initGauge(svgContext, gaugeType) {
+                svgContext.selectAll("g").remove(); // Clear previous gauge elements
+
+                // Define gradients once per SVG. Plain flags on the node keep these guards free
+                // of selector queries.
+                const svgNode = svgContext.node();
+                if (!svgNode.__defsInited) {
+                    svgNode.__defsInited = true;
+                    svgNode.appendChild(cloneGradientDefs());
+                }
+                svgNode.__gaugeInited = true;
+
+                const layerTransform = `translate(${centerX}, ${centerY})`;
+                const bgLayer = svgContext.append("g").attr("id", "bg-layer").attr("transform", layerTransform);
+                const fgLayer = svgContext.append("g").attr("id", "fg-layer").attr("transform", layerTransform);
+                const labelLayer = svgContext.append("g").attr("id", "label-layer").attr("transform", layerTransform);
+
+                if (gaugeType === "Round" || gaugeType === "Round Segmented") {
+                    const {rawStartRad, totalSweepMagnitude, arcGenerator} = getLayout(gaugeType);
+
+                    // With the canvas backend (see useCanvasBackend) the arcs and segments aren't part of the SVG
+                    const drawsArcs = svgContext.attr("data-backend") !== "canvas";
+                    if (gaugeType === "Round" && drawsArcs) { // Continuous Round
+                        let baseArcEnd;
+                        if (roundFillDirection === "counter-clockwise") {
+                            baseArcEnd = rawStartRad + totalSweepMagnitude;
+                        } else {
+                            baseArcEnd = rawStartRad - totalSweepMagnitude;
+                        }
+
+                        appendShape(bgLayer, "path", {d: arcGenerator({startAngle: rawStartRad, endAngle: baseArcEnd}), fill: "url(#inactiveRadialGradient)"});
+                        appendShape(fgLayer, "path", {"data-role": "active", fill: "url(#activeRadialGradient)"});
 
-                active_rgb = to_rgb(active_color)
-                inactive_rgb = to_rgb(inactive_color)
+                    } else if (gaugeType === "Round Segmented" && drawsArcs) {
+                        // Segments are bound to their layout data once; updateGauge only flips their fill.
+                        const {segmentAngles} = getLayout(gaugeType);
+                        const segmentData = d3.range(roundNumSegments).map(i => ({i, start: segmentAngles[2 * i], end: segmentAngles[2 * i + 1]}));
+                        appendSegments(bgLayer, "path", segmentData, {}, d => ({d: segmentPath(d.i, arcGenerator)}));
+                    }
 
-                for i in range(num_shadow_layers, -1, -1):
-                    current_offset_x = i * offset_factor
-                    current_offset_y = i * offset_factor
+                    // Debug angle markers: static markup from Python, hidden unless enabled
+                    labelLayer.html(angleMarkersSvg);
 
-                    # Inactive shadow bar
-                    ax.add_patch(Rectangle(
-                        (bar_x + current_offset_x, bar_y - current_offset_y),
-                        bar_width_ratio,
-                        bar_height_ratio,
-                        facecolor=tuple(c * (1 - 0.1 * i) for c in inactive_rgb),
-                        edgecolor='none',
-                        linewidth=0,
-                        transform=ax.transAxes,
-                        zorder=i
-                    ))
+                    // Determine text Y positions based on whether both are shown
+                    let valueTextY = 0;
+                    let nameTextY = 0;
 
-                    # Active shadow bar
-                    active_width_ratio = current_fill_ratio * bar_width_ratio
-                    if value > 0 and active_width_ratio < (1 / size_x):
-                        active_width_ratio = (1 / size_x) * 2
-                    if active_width_ratio > 0:
-                        ax.add_patch(Rectangle(
-                            (bar_x + current_offset_x, bar_y - current_offset_y),
-                            active_width_ratio,
-                            bar_height_ratio,
-                            facecolor=tuple(c * (1 - 0.1 * i) for c in active_rgb),
-                            edgecolor='none',
-                            linewidth=0,
-                            transform=ax.transAxes,
-                            zorder=i + 0.5
-                        ))
-
-            # Draw the main (front) inactive bar
-            ax.add_patch(Rectangle(
-                (bar_x, bar_y),
-                bar_width_ratio,
-                bar_height_ratio,
-                facecolor=inactive_color,
-                edgecolor='none',
-                linewidth=0,
-                transform=ax.transAxes,
-                zorder=100
-            ))
-            # Draw the main (front) active bar
-            active_width_ratio = current_fill_ratio * bar_width_ratio
-            if value > 0 and active_width_ratio < (1 / size_x): # Ensure a minimum visible bar for value > 0
-                active_width_ratio = (1 / size_x) * 2 # At least 2 pixels wide to be visible
+                    if (showValue && showName) {
+                        valueTextY = -20; // Value 20px above center
+                        nameTextY = 20; // Name 20px below center
+                    } else if (showValue && !showName) {
+                        valueTextY = 0; // Value centered if no name
+                    } else if (!showValue && showName) {
+                        nameTextY = 0; // Name centered if no value
+                    }
+
+                    drawLabels(labelLayer, 0, valueTextY, 0, nameTextY, "middle", "middle", "central");
+                } else if (gaugeType === "Linear" || gaugeType === "Linear Segmented") {
+                    const {currentRx, currentRy, segmentLength, segmentPositions, xStart, yStart, xEnd, yEnd} = getLayout(gaugeType);
+
+                    if (linearOrientation === "horizontal") {
+                        if (gaugeType === "Linear") { // Continuous Linear
+                            appendShape(bgLayer, "rect", {
+                                x: xStart, y: yStart, width: xEnd - xStart, height: linearThickness,
+                                rx: currentRx, ry: currentRy, fill: "url(#inactiveLinearGradient)"
+                            });
+                            appendShape(fgLayer, "rect", {
+                                "data-role": "active", x: xStart, y: yStart, height: linearThickness,
+                                ry: currentRy, fill: "url(#activeLinearGradient)"
+                            });
+                        } else { // Linear Segmented
+                            appendSegments(bgLayer, "rect", d3.range(linearNumSegments).map(i => ({i, position: segmentPositions[i]})), {
+                                y: -linearThickness / 2, width: segmentLength, height: linearThickness, rx: currentRx, ry: currentRy
+                            }, d => ({x: d.position}));
+                        }
+
+                        // Segmented: value text centered; continuous: its x is set in updateGauge
+                        drawLabels(labelLayer, 0, linearThickness / 2 + 30, 0, -linearThickness / 2 - 20, "middle", "middle");
+
+                    } else { // vertical
+                        if (gaugeType === "Linear") { // Continuous Linear
+                            appendShape(bgLayer, "rect", {
+                                x: xStart, y: yEnd, width: linearThickness, height: yStart - yEnd, // Draw from bottom up
+                                rx: currentRx, ry: currentRy, fill: "url(#inactiveLinearGradient)"
+                            });
+                            appendShape(fgLayer, "rect", {
+                                "data-role": "active", x: xStart, width: linearThickness,
+                                rx: currentRx, fill: "url(#activeLinearGradient)"
+                            });
+                        } else { // Linear Segmented
+                            appendSegments(bgLayer, "rect", d3.range(linearNumSegments).map(i => ({i, position: segmentPositions[i]})), {
+                                x: -linearThickness / 2, width: linearThickness, height: segmentLength, rx: currentRx, ry: currentRy
+                            }, d => ({y: d.position})); // Segments run downwards
+                        }
+
+                        // Segmented: value text centered; continuous: its y is set in updateGauge
+                        drawLabels(labelLayer, -linearThickness / 2 - 30, 0, linearThickness / 2 + 20, 0, "end", "start");
+                    }
+                }
+
+                // Handles to the value-dependent elements, so updateGauge patches them without selector queries
+                svgNode.__gaugeRefs = {
+                    activeShape: fgLayer.select("[data-role=active]"),
+                    valueText: labelLayer.select("text[data-role=value]"),
+                    segments: bgLayer.selectAll(".seg"),
+                };
+            }
+
+            // Updates only the value-dependent parts built by initGauge:
+            // the active arc/bar, segment fills and the value text.
+            function updateGauge(svgContext, currentValue, gaugeType) {
+                // Nothing to patch if this SVG already shows the value (e.g. repeated live-preview draws)
+                const svgNode = svgContext.node();
+                if (svgNode.__lastValue === currentValue) return;
+                svgNode.__lastValue = currentValue;
 
-            if active_width_ratio > 0:
-                ax.add_patch(Rectangle(
-                    (bar_x, bar_y),
-                    active_width_ratio,
-                    bar_height_ratio,
-                    facecolor=active_color,
-                    edgecolor='none',
-                    linewidth=0,
-                    transform=ax.transAxes,
-                    zorder=101
-                ))
-    
-        # Text positioning for horizontal
-        if show_name and gauge_name:
-            ax.text(0.5, bar_y - 0.05, gauge_name, ha='center', va='bottom', color=gauge_name_color, fontsize=bar_height_ratio * 1000, transform=ax.transAxes, zorder=120)
-        if show_value:
-            ax.text(bar_x + current_fill_ratio * bar_width_ratio, bar_y + bar_height_ratio + 0.05, f"{value}", ha='center', va='top', color=gauge_value_color, fontsize=bar_height_ratio * 1200, transform=ax.transAxes, zorder=120)
+                const currentFillRatio = Math.min(1, currentValue / totalValues);
+                const {activeShape, valueText, segments} = svgNode.__gaugeRefs;
+
+                if (gaugeType === "Round") { // Continuous Round
+                    const {rawStartRad, totalSweepMagnitude, arcGenerator} = getLayout(gaugeType);
+                    const filledSweepMagnitude = roundFilledSweep(currentValue, totalSweepMagnitude);
+
+                    if (filledSweepMagnitude > 0) {
+                        let activeArcEnd;
+                        if (roundFillDirection === "counter-clockwise") {
+                            activeArcEnd = rawStartRad + filledSweepMagnitude;
+                        } else {
+                            activeArcEnd = rawStartRad - filledSweepMagnitude;
+                        }
+                        activeShape
+                            .attr("d", arcGenerator({startAngle: rawStartRad, endAngle: activeArcEnd}))
+                            .attr("display", null);
+                    } else {
+                        activeShape.attr("display", "none");
+                    }
+                } else if (gaugeType === "Round Segmented") {
+                    const numActiveSegments = Math.floor(currentFillRatio * roundNumSegments);
+                    segments.attr("fill", d => d.i < numActiveSegments ? "url(#activeRadialGradient)" : "url(#inactiveRadialGradient)");
+                } else if (gaugeType === "Linear Segmented") {
+                    segments.attr("fill", d => d.i < (currentFillRatio * linearNumSegments) ? "url(#activeLinearGradient)" : "url(#inactiveLinearGradient)");
+                } else if (gaugeType === "Linear") { // Continuous Linear
+                    const {xStart, yStart, xEnd, yEnd} = getLayout(gaugeType);
+                    if (linearOrientation === "horizontal") {
+                        let activeWidth = currentFillRatio * (xEnd - xStart);
+                        activeWidth = Math.max(0, Math.min(xEnd - xStart, activeWidth));
+                        if (currentValue > 0 && activeWidth < 1) activeWidth = 1; // Ensure a minimum visible bar for value > 0
+
+                        activeShape
+                            .attr("width", f2(activeWidth))
+                            .attr("rx", tipStyle === "Rounded" ? f2(Math.min(linearThickness / 2, activeWidth / 2)) : 0)
+                            .attr("display", currentValue > 0 ? null : "none");
+
+                        let valueTextX;
+                        if (currentValue === 0) {
+                            valueTextX = xStart;
+                        } else if (currentValue === totalValues) {
+                            valueTextX = xEnd;
+                        } else {
+                            valueTextX = xStart + currentFillRatio * (xEnd - xStart);
+                        }
+                        valueText.attr("x", f2(valueTextX));
+                    } else { // vertical
+                        let activeHeight = currentFillRatio * (yStart - yEnd);
+                        activeHeight = Math.max(0, Math.min(yStart - yEnd, activeHeight));
+                        if (currentValue > 0 && activeHeight < 1) activeHeight = 1; // Ensure minimum visible bar
+
+                        activeShape
+                            .attr("y", f2(yStart - activeHeight)) // Draw from bottom up
+                            .attr("height", f2(activeHeight))
+                            .attr("ry", tipStyle === "Rounded" ? f2(Math.min(linearThickness / 2, activeHeight / 2)) : 0)
+                            .attr("display", currentValue > 0 ? null : "none");
+
+                        let valueTextY;
+                        if (currentValue === 0) {
+                            valueTextY = yStart;
+                        } else if (currentValue === totalValues) {
+                            valueTextY = yEnd;
+                        } else {
+                            valueTextY = yStart - currentFillRatio * (yStart - yEnd);
+                        }
+                        valueText.attr("y", f2(valueTextY));
+                    }
+                }
+
+                valueText.text(currentValue);
+            }
+
+            // One serializer for every SVG-to-string conversion on the page
+            const xmlSerializer = new XMLSerializer();
+
+            function drawGauge(svgContext, currentValue, gaugeType) {
+                if (!svgContext.node().__gaugeInited) initGauge(svgContext, gaugeType);
+                updateGauge(svgContext, currentValue, gaugeType);
+            }
+
+            // Draws a gauge SVG onto a canvas and passes the canvas to cb (null on failure). The live
+            // preview with the canvas backend is already a bitmap and is passed as is; any other SVG
+            // goes through an <img> decode.
+            function svgToCanvas(el, options, cb) {
+                if (canvasBackend && el === liveSvg.node()) {
+                    cb(canvasBackend.canvas);
+                    return;
+                }
+
+                const scale = options.scale || 1;
+                const svg = el.cloneNode(true);
+                svg.style.backgroundColor = options.backgroundColor;
+                const canvas = document.createElement("canvas");
+                canvas.width = Math.max(1, options.width * scale);
+                canvas.height = Math.max(1, options.height * scale);
+                const ctx = canvas.getContext("2d");
+                ctx.scale(scale, scale);
+
+                const url = URL.createObjectURL(new Blob([xmlSerializer.serializeToString(svg)], {type: "image/svg+xml;charset=utf-8"}));
+                const img = new Image();
+                img.onload = function() {
+                    ctx.drawImage(img, 0, 0, options.width, options.height);
+                    URL.revokeObjectURL(url);
+                    cb(canvas);
+                };
+                img.onerror = function(err) {
+                    console.error("Error loading SVG into image for conversion:", err);
+                    URL.revokeObjectURL(url);
+                    cb(null); // Indicate failure
+                };
+                img.src = url;
+            }
+
+            // Rasterizes a gauge SVG to a PNG data URI
+            function svgAsPngUri(el, options, cb) {
+                svgToCanvas(el, options, canvas => cb(canvas ? canvas.toDataURL("image/png", options.encoderOptions ?? 0.8) : null));
+            }
+
+            // Function to download SVG as PNG
+            function downloadSVGAsPNG(svgElement, filename, value) {
+                svgAsPngUri(svgElement, {width: width, height: height, backgroundColor: backgroundColor}, function(uri) {
+                    if (uri) {
+                        const downloadLink = document.createElement("a");
+                        downloadLink.href = uri;
+                        downloadLink.download = `gauge_${value}.png`;
+                        document.body.appendChild(downloadLink);
+                        downloadLink.click();
+                        document.body.removeChild(downloadLink);
+                    } else {
+                        console.error("Failed to generate PNG URI for single gauge.");
+                    }
+                });
+            }
+
+            // Loads a script from a CDN on first use
+            function loadScript(src, name) {
+                return new Promise((resolve, reject) => {
+                    const script = document.createElement("script");
+                    script.src = src;
+                    script.onload = resolve;
+                    script.onerror = () => {
+                        script.remove(); // Allow a retry on the next click
+                        reject(new Error(`Failed to load ${name}`));
+                    };
+                    document.head.appendChild(script);
+                });
+            }
 
-    else: # orientation == "vertical"
-        bar_width_ratio = bar_thickness_ratio_x
-        bar_height_ratio = 1 - 2 * padding_y_ratio
-        bar_x = 0.5 - bar_width_ratio / 2
-        bar_y = padding_y_ratio
+            const liveSvg = container.append("svg")
+                .attr("width", width)
+                .attr("height", height)
+                .attr("viewBox", `0 0 ${width} ${height}`)
+                .style("background-color", backgroundColor);
 
-        if num_segments > 1 and tip_style == "Straight": # Segmented vertical (straight ends)
-            total_drawable_length_pixels = size_y * bar_height_ratio
-            total_gap_length_pixels = (num_segments - 1) * linear_segment_gap_pixels
-            single_segment_length_pixels = (total_drawable_length_pixels - total_gap_length_pixels) / num_segments
-            single_segment_length_ratio = single_segment_length_pixels / size_y
+            // Canvas backend for the live preview of round gauges: every frame is one Path2D per
+            // color layer (inactive, active) filled with two fill() calls on an OffscreenCanvas,
+            // then blitted to a visible <canvas>. The (hidden) SVG still holds the labels, which
+            // are painted from its text nodes.
+            function useCanvasBackend(svgOverlay) {
+                const {innerRadius, outerRadius, rawStartRad, totalSweepMagnitude, segmentAngles} = getLayout(gaugeType);
+                const offscreen = typeof OffscreenCanvas !== "undefined"
+                    ? new OffscreenCanvas(width, height)
+                    : Object.assign(document.createElement("canvas"), {width: width, height: height});
+                const octx = offscreen.getContext("2d");
+                const layerArc = d3.arc()
+                    .innerRadius(innerRadius)
+                    .outerRadius(outerRadius)
+                    .cornerRadius(tipStyle === "Rounded" ? (outerRadius - innerRadius) / 2 : 0);
+
+                // Grows box (minX, minY, maxX, maxY around the gauge center) to hold the arc from a0 to a1
+                function extendArcBox(box, a0, a1) {
+                    const lo = Math.min(a0, a1);
+                    const hi = Math.max(a0, a1);
+                    for (const r of [innerRadius, outerRadius]) {
+                        for (const a of [lo, hi]) {
+                            box[0] = Math.min(box[0], r * Math.sin(a));
+                            box[1] = Math.min(box[1], -r * Math.cos(a));
+                            box[2] = Math.max(box[2], r * Math.sin(a));
+                            box[3] = Math.max(box[3], -r * Math.cos(a));
+                        }
+                    }
+                    for (let k = Math.ceil(lo / (Math.PI / 2)); k * Math.PI / 2 <= hi; k++) { // Axis extremes inside the arc
+                        box[0] = Math.min(box[0], outerRadius * Math.sin(k * Math.PI / 2));
+                        box[1] = Math.min(box[1], -outerRadius * Math.cos(k * Math.PI / 2));
+                        box[2] = Math.max(box[2], outerRadius * Math.sin(k * Math.PI / 2));
+                        box[3] = Math.max(box[3], -outerRadius * Math.cos(k * Math.PI / 2));
+                    }
+                }
+                const emptyBox = () => Float64Array.of(Infinity, Infinity, -Infinity, -Infinity);
+
+                // Adds the arc from a0 to a1 to a layer's path and bounding box
+                function addArc(path, box, a0, a1) {
+                    layerArc.context(path)({startAngle: a0, endAngle: a1});
+                    extendArcBox(box, a0, a1);
+                }
+
+                // Unit-square copy of an SVG radial gradient (stops read from the SVG defs)
+                function unitGradient(id) {
+                    const gradient = octx.createRadialGradient(0.35, 0.35, 0, 0.5, 0.5, 0.7);
+                    svgOverlay.selectAll(`#${id} stop`).each(function() {
+                        gradient.addColorStop(parseFloat(this.getAttribute("offset")) / 100, this.getAttribute("stop-color"));
+                    });
+                    return gradient;
+                }
+                let activeGradient = null;
+                let inactiveGradient = null;
+
+                // Fills a path in its bounding-box space, like SVG's objectBoundingBox gradients:
+                // the path is mapped into the unit square and the transform scales it back
+                function toUnitPath(path, box) {
+                    const w = Math.max(box[2] - box[0], EPSILON);
+                    const h = Math.max(box[3] - box[1], EPSILON);
+                    const unitPath = new Path2D();
+                    unitPath.addPath(path, {a: 1 / w, b: 0, c: 0, d: 1 / h, e: -box[0] / w, f: -box[1] / h});
+                    return unitPath;
+                }
+                function fillUnitPath(unitPath, box, gradient) {
+                    octx.setTransform(Math.max(box[2] - box[0], EPSILON), 0, 0, Math.max(box[3] - box[1], EPSILON), centerX + box[0], centerY + box[1]);
+                    octx.fillStyle = gradient;
+                    octx.fill(unitPath);
+                }
+                function fillLayer(path, box, gradient) {
+                    if (!(box[2] > box[0])) return; // Nothing in this layer
+                    fillUnitPath(toUnitPath(path, box), box, gradient);
+                }
+
+                // Every SVG segment carries its own gradient, so each segment keeps its own
+                // bounding box and unit-square path (built once, the segments never move)
+                const segmentBoxes = [];
+                const segmentUnitPaths = [];
+                if (gaugeType === "Round Segmented") {
+                    for (let i = 0; i < roundNumSegments; i++) {
+                        const path = new Path2D();
+                        const box = emptyBox();
+                        addArc(path, box, segmentAngles[2 * i], segmentAngles[2 * i + 1]);
+                        segmentBoxes.push(box);
+                        segmentUnitPaths.push(toUnitPath(path, box));
+                    }
+                }
+
+                // Paints the label layer's marker dots and texts (gauge-centered coordinates)
+                const textAlign = {start: "left", middle: "center", end: "right"};
+                function paintLabels() {
+                    octx.setTransform(1, 0, 0, 1, centerX, centerY);
+                    octx.textBaseline = "middle";
+                    const visible = node => d3.select(node.parentNode).attr("visibility") !== "hidden";
+                    svgOverlay.selectAll("#label-layer circle").each(function() {
+                        if (!visible(this)) return;
+                        octx.fillStyle = this.getAttribute("fill");
+                        octx.beginPath();
+                        octx.arc(+this.getAttribute("cx"), +this.getAttribute("cy"), +this.getAttribute("r"), 0, 2 * Math.PI);
+                        octx.fill();
+                    });
+                    svgOverlay.selectAll("#label-layer text").each(function() {
+                        if (!visible(this)) return;
+                        const marker = this.getAttribute("class") === "angle-marker-text";
+                        octx.fillStyle = marker ? "#ddd" : this.getAttribute("fill");
+                        octx.font = marker ? "12px sans-serif" : `${this.getAttribute("font-weight")} ${this.getAttribute("font-size")} ${this.getAttribute("font-family")}`;
+                        octx.textAlign = textAlign[this.getAttribute("text-anchor")] || "center";
+                        octx.fillText(this.textContent, +this.getAttribute("x"), +this.getAttribute("y"));
+                    });
+                }
+
+                container.style("position", "relative");
+                const canvas = container.insert("canvas", "svg")
+                    .attr("width", width)
+                    .attr("height", height)
+                    .style("display", "block")
+                    .node();
+                const vctx = canvas.getContext("2d");
+                svgOverlay
+                    .attr("data-backend", "canvas")
+                    .style("visibility", "hidden")
+                    .style("position", "absolute")
+                    .style("left", "0")
+                    .style("top", "0");
+
+                let lastDrawnValue = null;
+                return {
+                    canvas: canvas,
+                    draw(currentValue) {
+                        if (currentValue === lastDrawnValue) return;
+                        lastDrawnValue = currentValue;
+                        if (!activeGradient) {
+                            activeGradient = unitGradient("activeRadialGradient");
+                            inactiveGradient = unitGradient("inactiveRadialGradient");
+                        }
+
+                        octx.setTransform(1, 0, 0, 1, 0, 0);
+                        octx.fillStyle = backgroundColor;
+                        octx.fillRect(0, 0, width, height);
+                        if (gaugeType === "Round") { // Continuous Round: full inactive arc, active arc on top
+                            const inactivePath = new Path2D();
+                            const activePath = new Path2D();
+                            const inactiveBox = emptyBox();
+                            const activeBox = emptyBox();
+                            const direction = roundFillDirection === "counter-clockwise" ? 1 : -1;
+                            addArc(inactivePath, inactiveBox, rawStartRad, rawStartRad + direction * totalSweepMagnitude);
+                            const filledSweepMagnitude = roundFilledSweep(currentValue, totalSweepMagnitude);
+                            if (filledSweepMagnitude > 0) {
+                                addArc(activePath, activeBox, rawStartRad, rawStartRad + direction * filledSweepMagnitude);
+                            }
+                            fillLayer(inactivePath, inactiveBox, inactiveGradient);
+                            fillLayer(activePath, activeBox, activeGradient);
+                        } else { // Round Segmented: one gradient per segment, as in the SVG
+                            const numActiveSegments = Math.floor(Math.min(1, currentValue / totalValues) * roundNumSegments);
+                            for (let i = 0; i < roundNumSegments; i++) {
+                                fillUnitPath(segmentUnitPaths[i], segmentBoxes[i], i < numActiveSegments ? activeGradient : inactiveGradient);
+                            }
+                        }
+                        paintLabels();
+                        vctx.drawImage(offscreen, 0, 0);
+                    }
+                };
+            }
+            const canvasBackend = gaugeType === "Round" || gaugeType === "Round Segmented" ? useCanvasBackend(liveSvg) : null;
+
+            // Coalesces live-preview redraws to at most one per animation frame (the latest value wins)
+            let rafPending = false;
+            let pendingDraw = null;
+            function scheduleDraw(value, type) {
+                pendingDraw = [value, type];
+                if (rafPending) return;
+                rafPending = true;
+                requestAnimationFrame(() => {
+                    rafPending = false;
+                    drawGauge(liveSvg, pendingDraw[0], pendingDraw[1]);
+                    if (canvasBackend) canvasBackend.draw(pendingDraw[0]);
+                });
+            }
+
+            // The preview value comes from the messenger iframe rendered next to this page
+            // (_GAUGE_VALUE_MESSENGER): pushed as a message on every rerun, or read from the
+            // messenger's window if it was mounted first
+            let livePreviewValue = 0;
+            for (let i = 0; i < window.parent.frames.length; i++) {
+                try {
+                    const pushedValue = window.parent.frames[i].gaugeValue;
+                    if (typeof pushedValue === "number") livePreviewValue = pushedValue;
+                } catch (error) {
+                    // Cross-origin frame, not ours
+                }
+            }
+            window.addEventListener("message", event => {
+                if (event.data && event.data.type === "gauge:value") {
+                    livePreviewValue = event.data.value;
+                    scheduleDraw(livePreviewValue, gaugeType);
+                }
+            });
+            scheduleDraw(livePreviewValue, gaugeType);
 
-            current_pos_y = bar_y
-            num_active_segments = int(round(current_fill_ratio * num_segments))
+            // Add download button functionality for single image
+            window.downloadCurrentGauge = function() {
+                downloadSVGAsPNG(liveSvg.node(), `gauge_${livePreviewValue}.png`, livePreviewValue);
+            };
+
+            // The bulk export (#bulk-export-script) is only compiled on the first click, so the page
+            // doesn't parse it up front. Its top-level declarations share this script's globals.
+            // The source is only removed once it has replaced the loader, so a failed load can be retried.
+            window.downloadAllGauges = function loadBulkExport() {
+                const source = document.getElementById("bulk-export-script");
+                if (source) {
+                    const script = document.createElement("script");
+                    script.textContent = source.textContent;
+                    document.head.appendChild(script); // Runs synchronously and replaces window.downloadAllGauges
+                }
+                if (window.downloadAllGauges === loadBulkExport) { // Missing source, or it threw while compiling/running
+                    const statusMessageDiv = document.getElementById('d3-status-message');
+                    statusMessageDiv.style.color = 'red';
+                    statusMessageDiv.innerText = 'Error loading the bulk export. Check console.';
+                    console.error("The bulk export script did not define downloadAllGauges.");
+                    return;
+                }
+                source.remove();
+                return window.downloadAllGauges();
+            };
+        </script>
+        <script type="text/plain" id="bulk-export-script">
+            // Rasterizes a gauge SVG to a PNG Blob, which JSZip takes without a base64 round trip
+            function svgAsPngBlob(el, options, cb) {
+                svgToCanvas(el, options, canvas => canvas ? canvas.toBlob(cb, "image/png") : cb(null));
+            }
+
+            // JSZip is only needed for the bulk download, so it is loaded on first use
+            // instead of with the page
+            function ensureJsZip() {
+                if (window.JSZip) return Promise.resolve();
+                return loadScript("https://cdnjs.cloudflare.com/ajax/libs/jszip/3.10.1/jszip.min.js", "JSZip");
+            }
+
+            // svg2png-wasm (resvg compiled to WebAssembly) turns an SVG string straight into PNG
+            // bytes, without an <img> decode or a canvas. Loaded and initialized on first use.
+            let svg2pngInitialized = null;
+            function createSvg2png() {
+                if (!svg2pngInitialized) {
+                    svg2pngInitialized = loadScript("https://unpkg.com/svg2png-wasm@1.4.1/dist/index.min.js", "svg2png-wasm")
+                        .then(() => svg2pngWasm.initialize(fetch("https://unpkg.com/svg2png-wasm@1.4.1/svg2png_wasm_bg.wasm")))
+                        .catch(error => {
+                            svg2pngInitialized = null; // Allow a retry on the next click
+                            throw error;
+                        });
+                }
+                return svg2pngInitialized.then(() => svg2pngWasm.createSvg2png());
+            }
+
+            // Source of the bulk export's PNG encoding workers. SVG can't be decoded inside a
+            // worker, so each frame arrives as an ImageBitmap decoded on the main thread.
+            const PNG_WORKER_SOURCE = `
+                self.onmessage = async event => {
+                    const {index, bitmap, width, height, backgroundColor} = event.data;
+                    try {
+                        const canvas = new OffscreenCanvas(width, height);
+                        const ctx = canvas.getContext("2d");
+                        ctx.fillStyle = backgroundColor;
+                        ctx.fillRect(0, 0, width, height);
+                        ctx.drawImage(bitmap, 0, 0, width, height);
+                        bitmap.close();
+                        self.postMessage({index, blob: await canvas.convertToBlob({type: "image/png"})});
+                    } catch (error) {
+                        self.postMessage({index, error: String(error)});
+                    }
+                };
+            `;
+
+            // Pool of PNG encoding workers, one per core (up to 8). Returns null when the browser
+            // has no OffscreenCanvas, so the bulk export falls back to svgAsPngBlob.
+            function createPngWorkerPool() {
+                if (typeof Worker === "undefined" || typeof OffscreenCanvas === "undefined" || !OffscreenCanvas.prototype.convertToBlob) {
+                    return null;
+                }
+                const workerUrl = URL.createObjectURL(new Blob([PNG_WORKER_SOURCE], {type: "text/javascript"}));
+                const pending = new Map(); // frame index -> {resolve, reject}
+                const workers = [];
+                try {
+                    for (let i = 0; i < Math.min(navigator.hardwareConcurrency || 4, 8); i++) {
+                        const worker = new Worker(workerUrl);
+                        worker.onmessage = event => {
+                            const {index, blob, error} = event.data;
+                            const request = pending.get(index);
+                            if (!request) return; // Already failed by onerror
+                            pending.delete(index);
+                            if (error) request.reject(new Error(error));
+                            else request.resolve(blob);
+                        };
+                        worker.onerror = event => { // Worker failed to start: fail every frame still waiting
+                            pending.forEach(request => request.reject(new Error(event.message || "PNG worker error")));
+                            pending.clear();
+                        };
+                        workers.push(worker);
+                    }
+                } catch (error) { // Workers blocked (e.g. by a CSP)
+                    console.warn("PNG workers unavailable, encoding on the main thread:", error);
+                    workers.forEach(worker => worker.terminate());
+                    URL.revokeObjectURL(workerUrl);
+                    return null;
+                }
+                let nextWorker = 0;
+                return {
+                    // Encodes the bitmap of frame index to a PNG Blob (the bitmap is transferred)
+                    encode(index, bitmap) {
+                        return new Promise((resolve, reject) => {
+                            pending.set(index, {resolve, reject});
+                            workers[nextWorker++ % workers.length].postMessage({index, bitmap, width, height, backgroundColor}, [bitmap]);
+                        });
+                    },
+                    terminate() {
+                        workers.forEach(worker => worker.terminate());
+                        URL.revokeObjectURL(workerUrl);
+                    }
+                };
+            }
+
+            // Returns a function that serializes the current frame of an initialized gauge SVG. The
+            // <svg> tag with its <defs> and the layers the value never changes are serialized once;
+            // each frame only serializes the value-dependent layers.
+            function createFrameSerializer(svgNode, gaugeType) {
+                const shell = svgNode.cloneNode(false);
+                shell.appendChild(svgNode.querySelector("defs").cloneNode(true));
+                const shellString = xmlSerializer.serializeToString(shell);
+                const svgHead = shellString.slice(0, shellString.lastIndexOf("</"));
+                const svgTail = shellString.slice(shellString.lastIndexOf("</"));
+
+                // Segmented gauges change their segment fills (#bg-layer), continuous ones their
+                // active arc/bar (#fg-layer); the value text (#label-layer) changes for both
+                const dynamicLayer = gaugeType.endsWith("Segmented") ? "bg-layer" : "fg-layer";
+                const layers = Array.from(svgNode.children).filter(node => node.tagName === "g");
+                const staticStrings = layers.map(node => node.id === dynamicLayer || node.id === "label-layer" ? null : xmlSerializer.serializeToString(node));
+                return () => svgHead + layers.map((node, k) => staticStrings[k] ?? xmlSerializer.serializeToString(node)).join("") + svgTail;
+            }
+
+            // Decodes a serialized gauge SVG into an ImageBitmap for the encoding workers
+            function svgToBitmap(svgString) {
+                const url = URL.createObjectURL(new Blob([svgString], {type: "image/svg+xml;charset=utf-8"}));
+                const img = new Image(width, height);
+                img.src = url;
+                return img.decode()
+                    .then(() => createImageBitmap(img))
+                    .finally(() => URL.revokeObjectURL(url));
+            }
+
+            // Set to true to log every bulk export step to the console
+            const DEBUG = false;
 
-            for i in range(num_segments):
-                color = active_color if i < num_active_segments else inactive_color
-                ax.add_patch(Rectangle(
-                    (bar_x, current_pos_y),
-                    bar_width_ratio,
-                    single_segment_length_ratio,
-                    facecolor=color,
-                    edgecolor='none',
-                    linewidth=0,
-                    transform=ax.transAxes
-                ))
-                current_pos_y += single_segment_length_ratio + (linear_segment_gap_pixels / size_y)
-        else: # Continuous vertical
-            # Apply 3D effect for continuous linear gauges
-            if is_3d:
-                num_shadow_layers = 5
-                offset_factor = 0.0005 * bar_width_ratio # Small offset relative to bar width
+            // Function to download all 100 D3.js gauges
+            async function downloadAllGauges() {
+                // Status writes are coalesced into one DOM update per animation frame
+                const statusMessageDiv = document.getElementById('d3-status-message');
+                let pendingStatusText = null;
+                let pendingStatusColor = null;
+                let statusRaf = 0;
+                function setStatus(text, color = null) {
+                    pendingStatusText = text;
+                    if (color) pendingStatusColor = color;
+                    if (statusRaf) return;
+                    statusRaf = requestAnimationFrame(() => {
+                        statusRaf = 0;
+                        if (pendingStatusColor) statusMessageDiv.style.color = pendingStatusColor;
+                        statusMessageDiv.innerText = pendingStatusText;
+                        pendingStatusColor = null;
+                    });
+                }
+
+                // Ask for the target file first, while the click still counts as a user gesture; the
+                // ZIP is then streamed into it. Without the File System Access API (or when the
+                // picker is blocked) the ZIP is built as a Blob and downloaded through a link.
+                // Every error return below aborts the writable, so no partial file is left behind.
+                let zipWritable = null;
+                if (window.showSaveFilePicker) {
+                    try {
+                        const zipFileHandle = await window.showSaveFilePicker({
+                            suggestedName: "all_gauges.zip",
+                            types: [{description: "ZIP archive", accept: {"application/zip": [".zip"]}}]
+                        });
+                        zipWritable = await zipFileHandle.createWritable();
+                    } catch (error) {
+                        if (error.name === "AbortError") return; // Dialog cancelled
+                        console.warn("File picker unavailable, downloading the ZIP as a Blob:", error);
+                    }
+                }
+                async function abortZipFile() {
+                    if (!zipWritable) return;
+                    const writable = zipWritable;
+                    zipWritable = null;
+                    try {
+                        await writable.abort();
+                    } catch (abortError) {
+                        console.warn("Could not abort the ZIP file:", abortError);
+                    }
+                }
+
+                setStatus('Generating gauges (0/99)... Please wait.', '#007bff');
+                if (DEBUG) console.log("Starting bulk gauge generation...");
+
+                try {
+                    await ensureJsZip();
+                } catch (error) {
+                    setStatus('Error loading the ZIP library. Check your connection and try again.', 'red');
+                    console.error("Error loading JSZip:", error);
+                    await abortZipFile();
+                    return;
+                }
+
+                const zip = new JSZip();
+                const totalGauges = 100;
+                const gaugeTypeForFilename = gaugeType.toLowerCase().replace(/ /g, '_');
+                const filenames = Array.from({length: totalGauges}, (_, i) => `${String(i).padStart(2, '0')}_${gaugeTypeForFilename}.png`);
+
+                const tempSvg = d3.create("svg")
+                    .attr("width", width)
+                    .attr("height", height)
+                    .attr("viewBox", `0 0 ${width} ${height}`)
+                    .style("background-color", backgroundColor);
+                // Gradients go in up front, so drawGauge only ever builds and patches the layers
+                tempSvg.node().appendChild(cloneGradientDefs());
+                tempSvg.node().__defsInited = true;
+
+                // resvg has no access to the system fonts, so svg2png-wasm only rasterizes gauges
+                // without any text; the others go through the worker pool (or svgAsPngBlob)
+                let svg2png = null;
+                if (!showValue && !(showName && gaugeName) && !showAngleMarkers) {
+                    try {
+                        svg2png = await createSvg2png();
+                    } catch (error) {
+                        console.warn("svg2png-wasm unavailable, rasterizing with canvas:", error);
+                    }
+                }
+
+                // Each frame is serialized right after it is patched and then rasterized
+                // concurrently while the next frames are drawn, in micro-batches of up to 8 frames
+                // (one per worker), so only one batch of decoded bitmaps is held at a time
+                const pngPool = svg2png ? null : createPngWorkerPool();
+                const batchSize = Math.min(8, navigator.hardwareConcurrency || 4);
+                let encodedFrames = [];
+                let serializeFrame = null;
+
+                try {
+                    for (let i = 0; i < totalGauges; i++) {
+                        if (DEBUG) console.log(`Attempting to generate gauge for value ${i}`);
+
+                        // The first call builds the template layers, later ones only patch the
+                        // active arc/bar, segment fills and value text (see updateGauge)
+                        drawGauge(tempSvg, i, gaugeType);
+
+                        const filename = filenames[i];
+                        if (svg2png || pngPool) {
+                            if (!serializeFrame) serializeFrame = createFrameSerializer(tempSvg.node(), gaugeType);
+                            const svgString = serializeFrame();
+                            const png = svg2png
+                                ? svg2png(svgString, {width: width, height: height, backgroundColor: backgroundColor})
+                                : svgToBitmap(svgString).then(bitmap => pngPool.encode(i, bitmap));
+                            encodedFrames.push(png.then(data => zip.file(filename, data)));
+                            if (encodedFrames.length === batchSize || i === totalGauges - 1) {
+                                try {
+                                    await Promise.all(encodedFrames);
+                                } catch (encodeError) {
+                                    console.error("Error converting gauges to PNG:", encodeError);
+                                    setStatus('Error converting gauges to PNG. Check console.', 'red');
+                                    await abortZipFile();
+                                    return;
+                                }
+                                encodedFrames = [];
+                            }
+                        } else {
+                            let pngBlob;
+                            try {
+                                pngBlob = await new Promise((resolve) => {
+                                    svgAsPngBlob(tempSvg.node(), {scale: 1, width: width, height: height, backgroundColor: backgroundColor}, resolve);
+                                });
+                                if (!pngBlob) {
+                                    throw new Error("svgAsPngBlob returned no PNG data.");
+                                }
+                            } catch (svgError) {
+                                console.error(`Error converting SVG to PNG for value ${i}:`, svgError);
+                                setStatus(`Error converting gauge ${i} to PNG. Check console.`, 'red');
+                                await abortZipFile();
+                                return; // Stop execution on critical error
+                            }
+                            zip.file(filename, pngBlob, {compression: "STORE"});
+                        }
+
+                        // Update the progress and let the browser paint once every 10 frames
+                        if (i % 10 === 9) {
+                            setStatus(`Generating gauges (${i + 1}/${totalGauges})...`);
+                            await (window.scheduler?.yield ? scheduler.yield() : new Promise(resolve => requestAnimationFrame(resolve)));
+                        }
+                    }
+
+                    setStatus('Zipping all D3.js gauges... This may take a moment.');
+                    if (DEBUG) console.log("Starting D3.js zip generation...");
+                    if (zipWritable) {
+                        const writable = zipWritable;
+                        try {
+                            // Chunks are written to the file as JSZip produces them
+                            let written = Promise.resolve();
+                            await new Promise((resolve, reject) => {
+                                zip.generateInternalStream({type: "uint8array", compression: "STORE"})
+                                    .on("data", chunk => { written = written.then(() => writable.write(chunk)); })
+                                    .on("end", resolve)
+                                    .on("error", reject)
+                                    .resume();
+                            });
+                            await written;
+                            await writable.close();
+                            zipWritable = null;
+                            setStatus('All gauges generated and saved!', '#28a745');
+                        } catch (error) {
+                            await abortZipFile();
+                            setStatus('Error zipping gauges. Check console.', 'red');
+                            console.error("Error streaming zip:", error);
+                        }
+                        return;
+                    }
+                    zip.generateAsync({type:"blob", compression: "STORE"}) // PNGs are already deflated
+                        .then(function(content) {
+                            const downloadLink = document.createElement("a");
+                            downloadLink.href = URL.createObjectURL(content);
+                            downloadLink.download = "all_gauges.zip";
+                            document.body.appendChild(downloadLink);
+                            downloadLink.click();
+                            document.body.removeChild(downloadLink);
+                            setStatus('All gauges generated and download started!', '#28a745');
+                            if (DEBUG) console.log("gauges zip generated and download initiated.");
+                        })
+                        .catch(function(error) {
+                            setStatus('Error zipping gauges. Check console.', 'red');
+                            console.error("Error generating zip:", error);
+                        });
+                } catch (error) {
+                    setStatus('An unexpected error occurred during gauge generation. Check console.', 'red');
+                    console.error("Unexpected error in downloadAllGauges:", error);
+                    await abortZipFile();
+                } finally {
+                    if (pngPool) pngPool.terminate();
+                    if (svg2png) svg2png.dispose();
+                }
+            }
 
-                active_rgb = to_rgb(active_color)
-                inactive_rgb = to_rgb(inactive_color)
+            // Expose the bulk download function to the global scope
+            window.downloadAllGauges = downloadAllGauges;
+        </script>
+        <div style="text-align: center; margin-top: 20px;">
+            <button onclick="window.downloadCurrentGauge()" style="padding: 10px 20px; font-size: 16px; background-color: #007bff; color: white; border: none; border-radius: 8px; cursor: pointer; margin-bottom: 10px;">
+                Download Current Gauge
+            </button>
+            <button onclick="window.downloadAllGauges()" style="padding: 10px 20px; font-size: 16px; background-color: #28a745; color: white; border: none; border-radius: 8px; cursor: pointer;">
+                Generate and Download All Gauges (0-99)
+            </button>
+        </div>
+    </body>
+    </html>
+"""
+
+
+# Function to build the D3.js live preview / bulk export page for the current settings
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=64)
+def _build_gauge_html(
+    bg_color,
+    gauge_value_color,
+    gauge_name,
+    gauge_name_color,
+    output_width,
+    output_height,
+    active_color,
+    inactive_color,
+    show_value,
+    show_name,
+    show_angle_markers,
+    gauge_type,
+    tip_style,
+    gauge_thickness,
+    start_angle,
+    end_angle,
+    fill_direction,
+    num_segments,
+    segment_gap_deg,
+    linear_thickness,
+    linear_orientation,
+    linear_num_segments,
+    linear_segment_gap_pixels
+) -> str:
+    """
+    Returns the HTML for the D3.js component: the static _GAUGE_HTML_TEMPLATE with
+    the numeric settings injected as a packed binary payload and the rest as a JSON
+    payload. Every setting is an explicit argument, so Streamlit memoizes the page
+    across reruns and only rebuilds it when a setting changes.
+    """
+    numeric_params = {
+        "width": output_width,
+        "height": output_height,
+        "roundGaugeThickness": gauge_thickness,
+        "roundStartAngleRad": math.radians(start_angle),
+        "roundEndAngleRad": math.radians(end_angle),
+        "roundNumSegments": num_segments,
+        "roundSegmentGapRad": math.radians(segment_gap_deg),
+        "linearThickness": linear_thickness,
+        "linearNumSegments": linear_num_segments,
+        "linearSegmentGapPixels": linear_segment_gap_pixels,
+    }
+    packed = struct.pack(
+        f"<{len(_GAUGE_NUMERIC_PARAMS)}d",
+        *(numeric_params[name] for name in _GAUGE_NUMERIC_PARAMS),
+    )
+    params = {
+        "activeColor": active_color,
+        "inactiveColor": inactive_color,
+        "showValue": show_value,
+        "showName": show_name,
+        "gaugeName": gauge_name,
+        "backgroundColor": bg_color,
+        "gaugeType": gauge_type,
+        "tipStyle": tip_style,
+        "gaugeValueColor": gauge_value_color,
+        "gaugeNameColor": gauge_name_color,
+        "roundFillDirection": fill_direction,
+        "linearOrientation": linear_orientation,
+        "gradientDefs": _gradient_defs_svg(active_color, inactive_color, linear_orientation),
+        "showAngleMarkers": show_angle_markers,
+        "angleMarkersSvg": _angle_markers_svg(output_width, output_height, show_angle_markers),
+    }
+    # Escape "</" so a gauge name can't close the <script> element
+    return (
+        _GAUGE_HTML_TEMPLATE
+        .replace("__NUMERIC_PARAMS__", base64.b64encode(packed).decode("ascii"))
+        .replace("__PARAMS__", json.dumps(params).replace("</", "<\\/"))
+    )
 
-                for i in range(num_shadow_layers, -1, -1):
-                    current_offset_x = i * offset_factor
-                    current_offset_y = i * offset_factor
 
-                    # Inactive shadow bar
-                    ax.add_patch(Rectangle(
-                        (bar_x + current_offset_x, bar_y + bar_height_ratio - (bar_height_ratio + current_offset_y)),
-                        bar_width_ratio,
-                        bar_height_ratio,
-                        facecolor=tuple(c * (1 - 0.1 * i) for c in inactive_rgb),
-                        edgecolor='none',
-                        linewidth=0,
-                        transform=ax.transAxes,
-                        zorder=i
-                    ))
+# Tiny page that posts the live preview value to its sibling iframes (the D3.js page
+# listens for "gauge:value" messages) and keeps it in window.gaugeValue for a page
+# that is mounted after it
+_GAUGE_VALUE_MESSENGER = """
+<script>
+    window.gaugeValue = __VALUE__;
+    for (let i = 0; i < window.parent.frames.length; i++) {
+        window.parent.frames[i].postMessage({type: "gauge:value", value: window.gaugeValue}, "*");
+    }
+</script>
+"""
 
-                    # Active shadow bar
-                    active_height_ratio = current_fill_ratio * bar_height_ratio
-                    if value > 0 and active_height_ratio < (1 / size_y):
-                        active_height_ratio = (1 / size_y) * 2
-                    if active_height_ratio > 0:
-                        ax.add_patch(Rectangle(
-                            (bar_x + current_offset_x, bar_y + bar_height_ratio - active_height_ratio - current_offset_y),
-                            bar_width_ratio,
-                            active_height_ratio,
-                            facecolor=tuple(c * (1 - 0.1 * i) for c in active_rgb),
-                            edgecolor='none',
-                            linewidth=0,
-                            transform=ax.transAxes,
-                            zorder=i + 0.5
-                        ))
-
-            # Draw inactive bar
-            ax.add_patch(Rectangle(
-                (bar_x, bar_y),
-                bar_width_ratio,
-                bar_height_ratio,
-                facecolor=inactive_color,
-                edgecolor='none',
-                linewidth=0,
-                transform=ax.transAxes,
-                zorder=100
-            ))
-            # Draw active bar
-            active_height_ratio = current_fill_ratio * bar_height_ratio
-            if value > 0 and active_height_ratio < (1 / size_y): # Ensure a minimum visible bar for value > 0
-                active_height_ratio = (1 / size_y) * 2 # At least 2 pixels high to be visible
 
-            if active_height_ratio > 0:
-                ax.add_patch(Rectangle(
-                    (bar_x, bar_y + bar_height_ratio - active_height_ratio), # Draw from bottom up for vertical fill
-                    bar_width_ratio,
-                    active_height_ratio,
-                    facecolor=active_color,
-                    edgecolor='none',
-                    linewidth=0,
-                    transform=ax.transAxes,
-                    zorder=101
-                ))
+# Colors and legend labels of the ICL planner's block states
+_BLOCK_STATE_COLORS = {0: 'lightgray', 1: 'dodgerblue', 2: 'crimson'}
+_BLOCK_STATE_LABELS = {0: 'Free', 1: 'Occupied', 2: 'Overlap/Out of Range'}
 
-        # Text positioning for vertical
-        if show_name and gauge_name:
-            ax.text(bar_x - 0.05, 0.5, gauge_name, ha='right', va='center', rotation=90, color=gauge_name_color, fontsize=bar_width_ratio * 1000, transform=ax.transAxes, zorder=120)
-        if show_value:
-            ax.text(bar_x + bar_width_ratio + 0.05, bar_y + bar_height_ratio - current_fill_ratio * bar_height_ratio, f"{value}", ha='left', va='center', color=gauge_value_color, fontsize=bar_width_ratio * 1200, transform=ax.transAxes, zorder=120)
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format=image_format, bbox_inches='tight', pad_inches=0, transparent=False, dpi=output_dpi)
-    plt.close(fig)
-    buf.seek(0)
-    return buf
+# Function to build the ICL planner's block allocation map as inline SVG
+@st.cache_data(show_spinner=False, max_entries=32)
+def _block_map_svg(states_bytes: bytes, start_block: int, n_blocks: int) -> str:
+    """
+    Returns the allocation map as an <svg>: one cell per flash block colored by its
+    state, block numbers below it and a legend. Keyed on the raw block states, so
+    reruns with an unchanged plan reuse the markup.
+    """
+    states = np.frombuffer(states_bytes, dtype=np.uint8)
+    map_width = 1000
+    cell = map_width / n_blocks
+    outline = ' stroke="black" stroke-width="0.5"' if cell >= 3 else ''
+    tick_step = max(1, math.ceil(n_blocks / 20))
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="-10 0 {map_width + 20} 125" width="100%" '
+        'style="font-family: sans-serif; font-size: 12px; fill: currentColor;">',
+        f'<text x="{map_width / 2}" y="12" text-anchor="middle">'
+        'Memory Block Allocation (Red=Overlap/Out of Range, Blue=Occupied, Gray=Free)</text>',
+    ]
+    for i, state in enumerate(states.tolist()):
+        parts.append(f'<rect x="{i * cell:.2f}" y="20" width="{cell:.2f}" height="40" fill="{_BLOCK_STATE_COLORS[state]}"{outline}/>')
+    for i in range(0, n_blocks, tick_step):
+        parts.append(f'<text x="{(i + 0.5) * cell:.2f}" y="74" text-anchor="middle">{start_block + i}</text>')
+    parts.append(f'<text x="{map_width / 2}" y="92" text-anchor="middle">Flash Block Number</text>')
+    for k, state in enumerate(sorted(_BLOCK_STATE_COLORS)):
+        x = map_width / 2 - 240 + k * 160
+        parts.append(f'<rect x="{x}" y="104" width="12" height="12" fill="{_BLOCK_STATE_COLORS[state]}" stroke="black" stroke-width="0.5"/>')
+        parts.append(f'<text x="{x + 18}" y="114">{_BLOCK_STATE_LABELS[state]}</text>')
+    parts.append('</svg>')
+    return "".join(parts)
 
 
 # --- Streamlit Application Layout ---
@@ -764,775 +2643,76 @@ with selected_tab_title_obj[0]: # Gauge Generator Tab
     )
     st.info("The live preview below is for interactive rendering. Use the sidebar to adjust parameters.")
 
-    component_width_for_iframe = st.session_state['output_width']
-    component_height_for_iframe = st.session_state['output_height']
-
-    # D3.js HTML content
-    d3_html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Gauge Preview</title>
-        <script src="https://d3js.org/d3.v7.min.js"></script>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/jszip/3.10.1/jszip.min.js"></script>
-        <style>
-            body {{margin: 0; overflow: hidden; background-color: {st.session_state['bg_color']};}}
-            svg {{display: block;}}
-            .gauge-value-text {{
-                font-family: sans-serif;
-                font-size: 40px; /* Fixed size for reliability */
-                font-weight: bold;
-                text-anchor: middle;
-                fill: {st.session_state['gauge_value_color']};
-            }}
-            .gauge-name-text {{
-                font-family: sans-serif;
-                font-size: 30px; /* Fixed size for reliability */
-                font-weight: bold;
-                text-anchor: middle;
-                fill: {st.session_state['gauge_name_color']};
-            }}
-            .angle-marker-text {{
-                font-family: sans-serif;
-                font-size: 12px;
-                fill: #ddd;
-                text-anchor: middle;
-                dominant-baseline: central;
-            }}
-        </style>
-    </head>
-    <body>
-        <div id="gauge-container" style="width: {{width}}px; height: {{height}}px; margin: 0 auto;"></div>
-        <div id="d3-status-message" style="text-align: center; margin-top: 10px; font-weight: bold; color: #333;"></div>
-        <script>
-            // saveSvgAsPng.js functionality (embedded directly)
-            // Original source: https://github.com/exupero/saveSvgAsPng/blob/gh-pages/saveSvgAsPng.js
-            // Version 1.4.17
-            (function() {{
-                var out$ = typeof exports != 'undefined' && exports || this;
-
-                var defaultOpts = {{
-                    scale: 1,
-                    canvg: './canvg.js',
-                    encoderOptions: 0.8,
-                    backgroundColor: 'white',
-                    excludeUnusedCss: true,
-                    width: null,
-                    height: null,
-                    left: 0,
-                    top: 0,
-                    force: 'no'
-                }};
-
-                out$.svgAsPngUri = function(el, options, cb) {{
-                    options = Object.assign({{}}, defaultOpts, options);
-                    var svg = el.cloneNode(true);
-                    svg.style.backgroundColor = options.backgroundColor;
-
-                    var canvas = document.createElement('canvas');
-                    var ctx = canvas.getContext('2d');
-
-                    var svgRect = el.getBoundingClientRect();
-                    var width = options.width || svgRect.width;
-                    var height = options.height || svgRect.height;
-                    var left = options.left || svgRect.left;
-                    var top = options.top || svgRect.top;
-
-                    // Ensure minimum dimensions
-                    width = Math.max(1, width);
-                    height = Math.max(1, height);
-
-                    canvas.width = Math.max(1, width * options.scale);
-                    canvas.height = Math.max(1, height * options.scale);
-                    canvas.style.width = width + 'px';
-                    canvas.style.height = height + 'px';
-
-                    ctx.scale(options.scale, options.scale);
-
-                    var DOMURL = window.URL || window.webkitURL || window;
-                    var img = new Image();
-                    var svgStr = new XMLSerializer().serializeToString(svg);
-                    var blob = new Blob([svgStr], {{type: 'image/svg+xml;charset=utf-8'}});
-                    var url = DOMURL.createObjectURL(blob);
-
-                    img.onload = function() {{
-                        ctx.drawImage(img, left, top, width, height, 0, 0, width, height);
-                        DOMURL.revokeObjectURL(url);
-                        var uri = canvas.toDataURL('image/png', options.encoderOptions);
-                        cb(uri);
-                    }};
-                    img.onerror = function(err) {{
-                        console.error("Error loading SVG into image for conversion:", err);
-                        cb(null); // Indicate failure
-                    }};
-                    img.src = url;
-                }};
-            }})();
-            // End of saveSvgAsPng.js functionality
-
-            const container = d3.select("#gauge-container");
-            const width = {st.session_state['output_width']};
-            const height = {st.session_state['output_height']};
-            const centerX = width / 2;
-            const centerY = height / 2;
-
-            const livePreviewValue = {st.session_state['gauge_value']};
-            const totalValues = 100;
-            
-            const activeColor = '{st.session_state['active_color']}';
-            const inactiveColor = '{st.session_state['inactive_color']}';
-            const showValue = {str(st.session_state['show_value']).lower()};
-            const showName = {str(st.session_state['show_name']).lower()};
-            const gaugeName = "{st.session_state['gauge_name']}";
-            const backgroundColor = "{st.session_state['bg_color']}";
-            const showAngleMarkers = {str(st.session_state['show_angle_markers']).lower()};
-            const gaugeType = "{st.session_state['gauge_type']}";
-            const tipStyle = "{st.session_state['tip_style']}";
-            const gaugeValueColor = "{st.session_state['gauge_value_color']}"; // Pass to JS
-            const gaugeNameColor = "{st.session_state['gauge_name_color']}"; // Pass to JS
-
-
-            const roundGaugeThickness = {st.session_state['gauge_thickness']};
-            const roundStartAngleDeg = {st.session_state['start_angle']};
-            const roundEndAngleDeg = {st.session_state['end_angle']};
-            const roundFillDirection = '{st.session_state['fill_direction']}';
-            const roundNumSegments = {st.session_state['num_segments']};
-            const roundSegmentGapDeg = {st.session_state['segment_gap_deg']};
-
-            const linearThickness = {st.session_state['linear_thickness']};
-            const linearOrientation = '{st.session_state['linear_orientation']}';
-            const linearNumSegments = {st.session_state['linear_num_segments']};
-            const linearSegmentGapPixels = {st.session_state['linear_segment_gap_pixels']};
-
-
-            const EPSILON = 0.0001;
-
-            function degToRad(degrees) {{
-                return degrees * Math.PI / 180;
-            }}
-
-            // Function to create radial gradients with more pronounced 3D effect
-            function createRadialGradient(defs, id, baseColor) {{
-                const r = d3.color(baseColor).rgb();
-                const lightColor = `rgb(${{Math.min(255, r.r + 100)}}, ${{Math.min(255, r.g + 100)}}, ${{Math.min(255, r.b + 100)}})`;
-                const midColor = `rgb(${{r.r}}, ${{r.g}}, ${{r.b}})`;
-                const darkColor = `rgb(${{Math.max(0, r.r - 100)}}, ${{Math.max(0, r.g - 100)}}, ${{Math.max(0, r.b - 100)}})`;
-
-                defs.append("radialGradient")
-                    .attr("id", id)
-                    .attr("cx", "50%") .attr("cy", "50%")
-                    .attr("r", "70%")
-                    .attr("fx", "35%") .attr("fy", "35%")
-                    .selectAll("stop")
-                    .data([
-                        {{offset: "0%", color: lightColor}},
-                        {{offset: "50%", color: midColor}},
-                        {{offset: "100%", color: darkColor}}
-                    ])
-                    .enter().append("stop")
-                    .attr("offset", d => d.offset)
-                    .attr("stop-color", d => d.color);
-            }}
-
-            // Function to create linear gradients (for linear gauges)
-            function createLinearGradient(defs, id, baseColor, orientation) {{
-                const r = d3.color(baseColor).rgb();
-                const lightColor = `rgb(${{Math.min(255, r.r + 100)}}, ${{Math.min(255, r.g + 100)}}, ${{Math.min(255, r.b + 100)}})`;
-                const midColor = `rgb(${{r.r}}, ${{r.g}}, ${{r.b}})`;
-                const darkColor = `rgb(${{Math.max(0, r.r - 100)}}, ${{Math.max(0, r.g - 100)}}, ${{Math.max(0, r.b - 100)}})`;
-
-                const gradient = defs.append("linearGradient").attr("id", id);
-
-                if (orientation === "horizontal") {{
-                    gradient.attr("x1", "0%").attr("y1", "0%").attr("x2", "0%").attr("y2", "100%");
-                }} else {{ // vertical
-                    gradient.attr("x1", "0%").attr("y1", "0%").attr("x2", "100%").attr("y2", "0%");
-                }}
-
-                gradient.append("stop").attr("offset", "0%").attr("stop-color", lightColor);
-                gradient.append("stop").attr("offset", "50%").attr("stop-color", midColor);
-                gradient.append("stop").attr("offset", "100%").attr("stop-color", darkColor);
-            }}
-
-            function drawGauge(svgContext, currentValue, gaugeType) {{
-                svgContext.selectAll("g").remove(); // Clear previous gauge elements
-
-                const g = svgContext.append("g")
-                    .attr("transform", `translate(${{centerX}}, ${{centerY}})`);
-
-                // Define gradients once
-                if (svgContext.select("defs").empty()) {{
-                    const defs = svgContext.append("defs");
-                    createRadialGradient(defs, "activeRadialGradient", activeColor);
-                    createRadialGradient(defs, "inactiveRadialGradient", inactiveColor);
-                    createLinearGradient(defs, "activeLinearGradient", activeColor, linearOrientation);
-                    createLinearGradient(defs, "inactiveLinearGradient", inactiveColor, linearOrientation);
-                }}
-
-                const currentFillRatio = Math.min(1, currentValue / totalValues);
-
-                if (gaugeType === "Round" || gaugeType === "Round Segmented") {{
-                    const outerRadius = Math.min(width, height) / 2 * 0.9;
-                    const innerRadius = outerRadius * (1 - roundGaugeThickness);
-                    const markerRadius = outerRadius * 0.8;
-                    
-                    // Dynamic font sizes based on outerRadius for better scaling
-                    const valueFontSize = outerRadius * 0.45; 
-                    const nameFontSize = outerRadius * 0.3;
-
-                    let rawStartRad = degToRad(roundStartAngleDeg);
-                    let rawEndRad = degToRad(roundEndAngleDeg);
-
-                    let totalSweepMagnitude;
-                    if (roundFillDirection === "counter-clockwise") {{
-                        totalSweepMagnitude = rawEndRad - rawStartRad;
-                        if (totalSweepMagnitude < -EPSILON) totalSweepMagnitude += 2 * Math.PI;
-                        else if (totalSweepMagnitude > 2 * Math.PI + EPSILON) totalSweepMagnitude -= 2 * Math.PI;
-                    }} else {{ // clockwise
-                        totalSweepMagnitude = rawStartRad - rawEndRad;
-                        if (totalSweepMagnitude < -EPSILON) totalSweepMagnitude += 2 * Math.PI;
-                        else if (totalSweepMagnitude > 2 * Math.PI + EPSILON) totalSweepMagnitude -= 2 * Math.PI;
-                    }}
-                    
-                    if (Math.abs(totalSweepMagnitude) < EPSILON && Math.abs(rawStartRad - rawEndRad) < EPSILON) {{
-                        totalSweepMagnitude = 2 * Math.PI; // Full circle if start and end are same
-                    }}
-
-                    const arcGenerator = d3.arc()
-                        .innerRadius(innerRadius)
-                        .outerRadius(outerRadius)
-                        .cornerRadius(tipStyle === "Rounded" ? (outerRadius - innerRadius) / 2 : 0);
-
-                    if (gaugeType === "Round") {{ // Continuous Round
-                        let filledSweepMagnitude;
-                        const minActiveAngle = degToRad(2); // Minimum angle for value 1 to be visible
-
-                        if (currentValue === 0) {{
-                            filledSweepMagnitude = 0;
-                        }} else if (currentValue === 1 && totalSweepMagnitude > 0) {{
-                            filledSweepMagnitude = minActiveAngle; // Show a sliver for value 1
-                        }} else {{
-                            filledSweepMagnitude = currentFillRatio * totalSweepMagnitude;
-                        }}
-
-                        let baseArcEnd;
-                        if (roundFillDirection === "counter-clockwise") {{
-                            baseArcEnd = rawStartRad + totalSweepMagnitude;
-                        }} else {{
-                            baseArcEnd = rawStartRad - totalSweepMagnitude;
-                        }}
-
-                        g.append("path")
-                            .attr("d", arcGenerator({{startAngle: rawStartRad, endAngle: baseArcEnd}}))
-                            .attr("fill", "url(#inactiveRadialGradient)");
-
-                        if (filledSweepMagnitude > 0) {{
-                            let activeArcEnd;
-                            if (roundFillDirection === "counter-clockwise") {{
-                                activeArcEnd = rawStartRad + filledSweepMagnitude;
-                            }} else {{
-                                activeArcEnd = rawStartRad - filledSweepMagnitude;
-                            }}
-                            
-                            g.append("path")
-                                .attr("d", arcGenerator({{startAngle: rawStartRad, endAngle: activeArcEnd}}))
-                                .attr("fill", "url(#activeRadialGradient)");
-                        }}
-
-                    }} else if (gaugeType === "Round Segmented") {{
-                        const totalEffectiveSweep = totalSweepMagnitude - (roundNumSegments * degToRad(roundSegmentGapDeg));
-                        const singleSegmentAngle = totalEffectiveSweep / roundNumSegments;
-
-                        let currentSegmentStartAngle = rawStartRad;
-                        const numActiveSegments = Math.floor(currentFillRatio * roundNumSegments);
-
-                        for (let i = 0; i < roundNumSegments; i++) {{
-                            const segmentColor = i < numActiveSegments ? "url(#activeRadialGradient)" : "url(#inactiveRadialGradient)";
-                            
-                            let theta1_segment, theta2_segment;
-                            if (roundFillDirection === "counter-clockwise") {{
-                                theta1_segment = currentSegmentStartAngle;
-                                theta2_segment = currentSegmentStartAngle + singleSegmentAngle;
-                            }} else {{
-                                theta1_segment = currentSegmentStartAngle - singleSegmentAngle;
-                                theta2_segment = currentSegmentStartAngle;
-                            }}
-
-                            g.append("path")
-                                .attr("d", arcGenerator({{startAngle: theta1_segment, endAngle: theta2_segment}}))
-                                .attr("fill", segmentColor);
-
-                            if (roundFillDirection === "counter-clockwise") {{
-                                currentSegmentStartAngle += (singleSegmentAngle + degToRad(roundSegmentGapDeg));
-                            }} else {{
-                                currentSegmentStartAngle -= (singleSegmentAngle + degToRad(roundSegmentGapDeg));
-                            }}
-                        }}
-                    }}
-
-                    if (showAngleMarkers) {{
-                        const angles = [0, 90, 180, 270];
-                        angles.forEach(angleDeg => {{
-                            const angleRad = degToRad(angleDeg);
-                            const x = markerRadius * Math.cos(angleRad);
-                            const y = markerRadius * Math.sin(angleRad);
-                            
-                            g.append("circle")
-                                .attr("cx", x)
-                                .attr("cy", y)
-                                .attr("r", 3)
-                                .attr("fill", "red");
-                            
-                            let textOffsetX = 0;
-                            let textOffsetY = 0;
-                            const textOffsetDistance = outerRadius * 0.15;
-                            let textAnchor = "middle";
-                            
-                            if (angleDeg === 0) {{
-                                textOffsetX = textOffsetDistance;
-                                textAnchor = "start";
-                            }} else if (angleDeg === 90) {{
-                                textOffsetY = -textOffsetDistance;
-                                textAnchor = "middle";
-                            }} else if (angleDeg === 180) {{
-                                textOffsetX = -textOffsetDistance;
-                                textAnchor = "end";
-                            }} else if (angleDeg === 270) {{
-                                textOffsetY = textOffsetDistance;
-                                textAnchor = "middle";
-                            }}
-
-                            g.append("text")
-                                .attr("class", "angle-marker-text")
-                                .attr("x", x + textOffsetX)
-                                .attr("y", y + textOffsetY)
-                                .attr("text-anchor", textAnchor)
-                                .text(angleDeg + "°");
-                        }});
-                    }}
-
-                    // Determine text Y positions based on whether both are shown
-                    let valueTextY = 0;
-                    let nameTextY = 0;
-
-                    if (showValue && showName) {{
-                        valueTextY = -20; // Value 20px above center
-                        nameTextY = 20; // Name 20px below center
-                    }} else if (showValue && !showName) {{
-                        valueTextY = 0; // Value centered if no name
-                    }} else if (!showValue && showName) {{
-                        nameTextY = 0; // Name centered if no value
-                    }}
-
-                    // Add Gauge Name text if requested
-                    if (showName && gaugeName) {{
-                        g.append("text")
-                            .attr("x", 0)
-                            .attr("y", nameTextY)
-                            .attr("fill", gaugeNameColor)
-                            .attr("font-family", "sans-serif")
-                            .attr("font-size", "30px")
-                            .attr("font-weight", "bold")
-                            .attr("text-anchor", "middle")
-                            .attr("dominant-baseline", "central")
-                            .text(gaugeName);
-                    }}
-
-                    // Add Gauge Value text if requested
-                    if (showValue) {{
-                        g.append("text")
-                            .attr("x", 0)
-                            .attr("y", valueTextY)
-                            .attr("fill", gaugeValueColor)
-                            .attr("font-family", "sans-serif")
-                            .attr("font-size", "40px")
-                            .attr("font-weight", "bold")
-                            .attr("text-anchor", "middle")
-                            .attr("dominant-baseline", "central")
-                            .text(currentValue);
-                    }}
-                }} else if (gaugeType === "Linear" || gaugeType === "Linear Segmented") {{
-                    const padding = 20;
-                    let xStart, yStart, xEnd, yEnd;
-                    const currentRx = tipStyle === "Rounded" ? linearThickness / 2 : 0;
-                    const currentRy = tipStyle === "Rounded" ? linearThickness / 2 : 0;
-
-                    if (linearOrientation === "horizontal") {{
-                        xStart = -width / 2 + padding;
-                        yStart = -linearThickness / 2;
-                        xEnd = width / 2 - padding;
-                        yEnd = linearThickness / 2;
-
-                        if (gaugeType === "Linear") {{ // Continuous Linear
-                            g.append("rect")
-                                .attr("x", xStart)
-                                .attr("y", yStart)
-                                .attr("width", xEnd - xStart)
-                                .attr("height", linearThickness)
-                                .attr("rx", currentRx)
-                                .attr("ry", currentRy)
-                                .attr("fill", "url(#inactiveLinearGradient)");
-
-                            let activeWidth = currentFillRatio * (xEnd - xStart);
-                            activeWidth = Math.max(0, Math.min(xEnd - xStart, activeWidth));
-                            if (currentValue > 0 && activeWidth < 1) activeWidth = 1; // Ensure a minimum visible bar for value > 0
-
-                            if (currentValue > 0) {{
-                                g.append("rect")
-                                    .attr("x", xStart)
-                                    .attr("y", yStart)
-                                    .attr("width", activeWidth)
-                                    .attr("height", linearThickness)
-                                    .attr("rx", tipStyle === "Rounded" ? Math.min(linearThickness / 2, activeWidth / 2) : 0)
-                                    .attr("ry", currentRy)
-                                    .attr("fill", "url(#activeLinearGradient)");
-                            }}
-                        }} else {{ // Linear Segmented
-                            const totalBarLength = width - 2 * padding;
-                            const totalGapLength = linearNumSegments > 1 ? (linearNumSegments - 1) * linearSegmentGapPixels : 0;
-                            let segmentLength = (totalBarLength - totalGapLength) / linearNumSegments;
-                            if (segmentLength < 0) segmentLength = 0;
-
-                            let currentPosition = -width / 2 + padding;
-
-                            for (let i = 0; i < linearNumSegments; i++) {{
-                                const segmentColor = i < (currentFillRatio * linearNumSegments) ? "url(#activeLinearGradient)" : "url(#inactiveLinearGradient)";
-                                
-                                g.append("rect")
-                                    .attr("x", currentPosition)
-                                    .attr("y", -linearThickness / 2)
-                                    .attr("width", segmentLength)
-                                    .attr("height", linearThickness)
-                                    .attr("rx", currentRx)
-                                    .attr("ry", currentRy)
-                                    .attr("fill", segmentColor);
-                                
-                                currentPosition += segmentLength + linearSegmentGapPixels;
-                            }}
-                        }}
-
-                        if (showName && gaugeName) {{
-                            g.append("text")
-                                .attr("class", "gauge-name-text")
-                                .attr("x", 0)
-                                .attr("y", -linearThickness / 2 - 20)
-                                .attr("fill", gaugeNameColor)
-                                .text(gaugeName);
-                        }}
-                        if (showValue) {{
-                            let valueTextX;
-                            if (gaugeType === "Linear") {{
-                                if (currentValue === 0) {{
-                                    valueTextX = xStart;
-                                }} else if (currentValue === totalValues) {{
-                                    valueTextX = xEnd;
-                                }} else {{
-                                    valueTextX = xStart + currentFillRatio * (xEnd - xStart);
-                                }}
-                            }} else {{ // Segmented, value text centered
-                                valueTextX = 0;
-                            }}
-                            
-                            g.append("text")
-                                .attr("class", "gauge-value-text")
-                                .attr("x", valueTextX)
-                                .attr("y", linearThickness / 2 + 30)
-                                .attr("fill", gaugeValueColor)
-                                .text(currentValue);
-                        }}
-
-                    }} else {{ // vertical
-                        xStart = -linearThickness / 2;
-                        yStart = height / 2 - padding; // Top of the bar
-                        xEnd = linearThickness / 2;
-                        yEnd = -height / 2 + padding; // Bottom of the bar
-
-                        if (gaugeType === "Linear") {{ // Continuous Linear
-                            g.append("rect")
-                                .attr("x", xStart)
-                                .attr("y", yEnd) // Draw from bottom up
-                                .attr("width", linearThickness)
-                                .attr("height", yStart - yEnd)
-                                .attr("rx", currentRx)
-                                .attr("ry", currentRy)
-                                .attr("fill", "url(#inactiveLinearGradient)");
-
-                            let activeHeight = currentFillRatio * (yStart - yEnd);
-                            activeHeight = Math.max(0, Math.min(yStart - yEnd, activeHeight));
-                            if (currentValue > 0 && activeHeight < 1) activeHeight = 1; // Ensure minimum visible bar
-
-                            if (currentValue > 0) {{
-                                g.append("rect")
-                                    .attr("x", xStart)
-                                    .attr("y", yStart - activeHeight) // Draw from bottom up
-                                    .attr("width", linearThickness)
-                                    .attr("height", activeHeight)
-                                    .attr("rx", currentRx)
-                                    .attr("ry", tipStyle === "Rounded" ? Math.min(linearThickness / 2, activeHeight / 2) : 0)
-                                    .attr("fill", "url(#activeLinearGradient)");
-                            }}
-                        }} else {{ // Linear Segmented
-                            const totalBarLength = height - 2 * padding;
-                            const totalGapLength = linearNumSegments > 1 ? (linearNumSegments - 1) * linearSegmentGapPixels : 0;
-                            let segmentLength = (totalBarLength - totalGapLength) / linearNumSegments;
-                            if (segmentLength < 0) segmentLength = 0;
-
-                            let currentPosition = height / 2 - padding; // Start from top for vertical segments
-
-                            for (let i = 0; i < linearNumSegments; i++) {{
-                                const segmentColor = i < (currentFillRatio * linearNumSegments) ? "url(#activeLinearGradient)" : "url(#inactiveLinearGradient)";
-                                
-                                g.append("rect")
-                                    .attr("x", -linearThickness / 2)
-                                    .attr("y", currentPosition - segmentLength) // Draw segments downwards
-                                    .attr("width", linearThickness)
-                                    .attr("height", segmentLength)
-                                    .attr("rx", currentRx)
-                                    .attr("ry", currentRy)
-                                    .attr("fill", segmentColor);
-                                
-                                currentPosition -= (segmentLength + linearSegmentGapPixels);
-                            }}
-                        }}
-
-                        if (showName && gaugeName) {{
-                            g.append("text")
-                                .attr("class", "gauge-name-text")
-                                .attr("x", linearThickness / 2 + 20)
-                                .attr("y", 0)
-                                .attr("text-anchor", "start")
-                                .attr("fill", gaugeNameColor)
-                                .text(gaugeName);
-                        }}
-                        if (showValue) {{
-                            let valueTextY;
-                            if (gaugeType === "Linear") {{
-                                if (currentValue === 0) {{
-                                    valueTextY = yStart;
-                                }} else if (currentValue === totalValues) {{
-                                    valueTextY = yEnd;
-                                }} else {{
-                                    valueTextY = yStart - currentFillRatio * (yStart - yEnd);
-                                }}
-                            }} else {{ // Segmented, value text centered
-                                valueTextY = 0;
-                            }}
-                            g.append("text")
-                                .attr("class", "gauge-value-text")
-                                .attr("x", -linearThickness / 2 - 30)
-                                .attr("y", valueTextY)
-                                .attr("text-anchor", "end")
-                                .attr("fill", gaugeValueColor)
-                                .text(currentValue);
-                        }}
-                    }}
-                }}
-            }}
-
-            // Function to download SVG as PNG (using the embedded functionality)
-            function downloadSVGAsPNG(svgElement, filename, value) {{
-                svgAsPngUri(svgElement, {{width: width, height: height, backgroundColor: backgroundColor}}, function(uri) {{
-                    if (uri) {{
-                        const downloadLink = document.createElement("a");
-                        downloadLink.href = uri;
-                        downloadLink.download = `gauge_${{value}}.png`;
-                        document.body.appendChild(downloadLink);
-                        downloadLink.click();
-                        document.body.removeChild(downloadLink);
-                    }} else {{
-                        console.error("Failed to generate PNG URI for single gauge.");
-                    }}
-                }});
-            }}
-
-            // Function to download all 100 D3.js gauges
-            async function downloadAllGauges() {{
-                const statusMessageDiv = document.getElementById('d3-status-message');
-                statusMessageDiv.style.color = '#007bff';
-                statusMessageDiv.innerText = 'Generating gauges (0/99)... Please wait.';
-                console.log("Starting bulk gauge generation...");
-
-                const zip = new JSZip();
-                const totalGauges = 100;
-                const gaugeTypeForFilename = gaugeType.toLowerCase().replace(' ', '_');
-
-                const tempSvg = d3.create("svg")
-                    .attr("width", width)
-                    .attr("height", height)
-                    .attr("viewBox", `0 0 ${{width}} ${{height}}`)
-                    .style("background-color", backgroundColor);
-
-                const defs = tempSvg.append("defs");
-                createRadialGradient(defs, "activeRadialGradient", activeColor);
-                createRadialGradient(defs, "inactiveRadialGradient", inactiveColor);
-                createLinearGradient(defs, "activeLinearGradient", activeColor, linearOrientation);
-                createLinearGradient(defs, "inactiveLinearGradient", inactiveColor, linearOrientation);
+    # Snapshot the preview settings once; plain dict reads skip the session-state proxy
+    gauge_settings = {key: st.session_state[key] for key in _GAUGE_HTML_KEYS}
+    component_width_for_iframe = gauge_settings['output_width']
+    component_height_for_iframe = gauge_settings['output_height']
 
-                // Ensure svgAsPngUri is available (it should be now that it's embedded)
-                if (typeof svgAsPngUri === 'undefined') {{
-                    statusMessageDiv.style.color = 'red';
-                    statusMessageDiv.innerText = 'Error: svgAsPngUri function not found. Image generation aborted.';
-                    console.error('svgAsPngUri function is not defined, despite embedding attempt.');
-                    return;
-                }}
-
-                try {{
-                    for (let i = 0; i < totalGauges; i++) {{
-                        statusMessageDiv.innerText = `Generating gauges (${{i + 1}}/{{totalGauges}})...`;
-                        console.log(`Attempting to generate gauge for value ${{i}}`);
-
-                        tempSvg.selectAll("g").remove(); // Clear previous content
-                        drawGauge(tempSvg, i, gaugeType); // Draw the current gauge
-
-                        // Add a small delay to allow SVG rendering to settle
-                        await new Promise(resolve => setTimeout(resolve, 50));
-
-                        let dataUri;
-                        try {{
-                            dataUri = await new Promise((resolve) => {{
-                                svgAsPngUri(tempSvg.node(), {{scale: 1, encoderOptions: 1, width: width, height: height, backgroundColor: backgroundColor}}, resolve);
-                            }});
-                            console.log(`Data URI for value ${{i}}:`, dataUri); // Added log for debugging
-                            if (!dataUri) {{
-                                throw new Error("svgAsPngUri returned empty data URI.");
-                            }}
-                        }} catch (svgError) {{
-                            console.error(`Error converting SVG to PNG for value ${{i}}:`, svgError);
-                            statusMessageDiv.style.color = 'red';
-                            statusMessageDiv.innerText = `Error converting gauge ${{i}} to PNG. Check console.`;
-                            return; // Stop execution on critical error
-                        }}
-                        
-                        const base64Data = dataUri.split(',')[1];
-                        if (!base64Data) {{
-                            console.error(`Base64 data missing for value ${{i}} from URI: ${{dataUri}}`);
-                            statusMessageDiv.style.color = 'red';
-                            statusMessageDiv.innerText = `Error processing base64 data for gauge ${{i}}. Check console.`;
-                            return; // Stop execution
-                        }}
-                        zip.file(`${{i.toString().padStart(2, '0')}}_${{gaugeTypeForFilename}}.png`, base64Data, {{base64: true}});
-                        
-                        // Yield control to the browser (already present, but good to keep)
-                        await new Promise(resolve => setTimeout(resolve, 10)); 
-                    }}
-
-                    statusMessageDiv.innerText = 'Zipping all D3.js gauges... This may take a moment.';
-                    console.log("Starting D3.js zip generation...");
-                    zip.generateAsync({{type:"blob", compression: "DEFLATE", compressionOptions: {{level: 9}}}})
-                        .then(function(content) {{
-                            const downloadLink = document.createElement("a");
-                            downloadLink.href = URL.createObjectURL(content);
-                            downloadLink.download = "all_gauges.zip";
-                            document.body.appendChild(downloadLink);
-                            downloadLink.click();
-                            document.body.removeChild(downloadLink);
-                            statusMessageDiv.style.color = '#28a745';
-                            statusMessageDiv.innerText = 'All gauges generated and download started!';
-                            console.log("gauges zip generated and download initiated.");
-                        }})
-                        .catch(function(error) {{
-                            statusMessageDiv.style.color = 'red';
-                            statusMessageDiv.innerText = 'Error zipping gauges. Check console.';
-                            console.error("Error generating zip:", error);
-                        }});
-                }} catch (error) {{
-                    statusMessageDiv.style.color = 'red';
-                    statusMessageDiv.innerText = 'An unexpected error occurred during gauge generation. Check console.';
-                    console.error("Unexpected error in downloadAllGauges:", error);
-                }}
-            }}
+    # The value goes through its own zero-height iframe; the gauge page only changes (and is
+    # re-created) when one of its settings does
+    st.components.v1.html(
+        _GAUGE_VALUE_MESSENGER.replace("__VALUE__", json.dumps(st.session_state['gauge_value'])),
+        height=0,
+    )
+    d3_html_content = _build_gauge_html(**gauge_settings)
+    st.components.v1.html(d3_html_content, height=component_height_for_iframe + 250, width=component_width_for_iframe +200, scrolling=False)
 
-            const liveSvg = container.append("svg")
-                .attr("width", width)
-                .attr("height", height)
-                .attr("viewBox", `0 0 ${{width}} ${{height}}`)
-                .style("background-color", backgroundColor);
-            drawGauge(liveSvg, livePreviewValue, gaugeType);
 
-            // Add download button functionality for single image
-            window.downloadCurrentGauge = function() {{
-                downloadSVGAsPNG(liveSvg.node(), `gauge_${{livePreviewValue}}.png`, livePreviewValue);
-            }};
+    # Server-side export of ROUND gauges with the Python renderers
+    if st.session_state['gauge_type'] in ["Round", "Round Segmented"]:
+        st.markdown(
+        "<h2 style='color:white; margin-bottom: 0.5rem;'>Python Export</h2>",
+        unsafe_allow_html=True,
+        )
+        python_renderer = st.radio(
+            "Python Renderer", ("matplotlib", "pillow"), horizontal=True, key="python_renderer_radio"
+        )
+        round_gauge_kwargs = dict(
+            size_x=st.session_state['output_width'],
+            size_y=st.session_state['output_height'],
+            active_color=st.session_state['active_color'],
+            inactive_color=st.session_state['inactive_color'],
+            bg_color=st.session_state['bg_color'],
+            gauge_name=st.session_state['gauge_name'],
+            show_name=st.session_state['show_name'],
+            show_value=st.session_state['show_value'],
+            image_format="png",
+            gauge_thickness_pixels=int(st.session_state['gauge_thickness'] * min(st.session_state['output_width'], st.session_state['output_height']) / 2),
+            gauge_start_angle_deg=st.session_state['start_angle'],
+            gauge_end_angle_deg=st.session_state['end_angle'],
+            fill_direction=st.session_state['fill_direction'],
+            output_dpi=100,
+            gauge_type="segmented" if st.session_state['gauge_type'] == "Round Segmented" else "continuous",
+            num_segments=st.session_state['num_segments'],
+            segment_gap_deg=st.session_state['segment_gap_deg'],
+            is_3d=st.session_state['is_3d'],
+            gauge_value_color=st.session_state['gauge_value_color'],
+            gauge_name_color=st.session_state['gauge_name_color']
+        )
+        st.image(
+            _cached_gauge(value=st.session_state['gauge_value'], renderer=python_renderer, **round_gauge_kwargs),
+            caption=f"{python_renderer.capitalize()} render of the current value"
+        )
 
-            // Expose the bulk download function to the global scope
-            window.downloadAllGauges = downloadAllGauges;
-        </script>
-        <div style="text-align: center; margin-top: 20px;">
-            <button onclick="window.downloadCurrentGauge()" style="padding: 10px 20px; font-size: 16px; background-color: #007bff; color: white; border: none; border-radius: 8px; cursor: pointer; margin-bottom: 10px;">
-                Download Current Gauge
-            </button>
-            <button onclick="window.downloadAllGauges()" style="padding: 10px 20px; font-size: 16px; background-color: #28a745; color: white; border: none; border-radius: 8px; cursor: pointer;">
-                Generate and Download All Gauges (0-99)
-            </button>
-        </div>
-    </body>
-    </html>
-    """
-    st.components.v1.html(d3_html_content, height=component_height_for_iframe + 250, width=component_width_for_iframe +200)
-
-
-    # Removed Matplotlib bulk download button and logic as requested.
-    # if st.button("Generate and Download All Gauge Images (0-99) (Matplotlib)", key="download_all_matplotlib_gauges_button"):
-    #     with st.spinner("Generating Matplotlib gauge images... This may take a moment."):
-    #         zip_buffer = io.BytesIO()
-    #         with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATE, False) as zipf:
-    #             for val in range(100):
-    #                 if st.session_state['gauge_type'] == "Round" or st.session_state['gauge_type'] == "Round Segmented":
-    #                     img_buffer = create_gauge_image(
-    #                         value=val,
-    #                         size_x=st.session_state['output_width'],
-    #                         size_y=st.session_state['output_height'],
-    #                         active_color=st.session_state['active_color'],
-    #                         inactive_color=st.session_state['inactive_color'],
-    #                         bg_color=st.session_state['bg_color'],
-    #                         gauge_name=st.session_state['gauge_name'],
-    #                         show_name=st.session_state['show_name'],
-    #                         show_value=st.session_state['show_value'],
-    #                         image_format="png",
-    #                         gauge_thickness_pixels=int(st.session_state['gauge_thickness'] * min(st.session_state['output_width'], st.session_state['output_height']) / 2),
-    #                         gauge_start_angle_deg=st.session_state['start_angle'],
-    #                         gauge_end_angle_deg=st.session_state['end_angle'],
-    #                         fill_direction=st.session_state['fill_direction'],
-    #                         output_dpi=100,
-    #                         gauge_type=st.session_state['gauge_type'].replace("Round ", "").lower(), # Convert to "continuous" or "segmented"
-    #                         num_segments=st.session_state['num_segments'],
-    #                         segment_gap_deg=st.session_state['segment_gap_deg'],
-    #                         is_3d=st.session_state['is_3d'],
-    #                         gauge_value_color=st.session_state['gauge_value_color'], # Pass value color
-    #                         gauge_name_color=st.session_state['gauge_name_color'] # Pass name color
-    #                     )
-    #                 elif st.session_state['gauge_type'] == "Linear" or st.session_state['gauge_type'] == "Linear Segmented":
-    #                     img_buffer = create_linear_gauge_image(
-    #                         value=val,
-    #                         size_x=st.session_state['output_width'],
-    #                         size_y=st.session_state['output_height'],
-    #                         active_color=st.session_state['active_color'],
-    #                         inactive_color=st.session_state['inactive_color'],
-    #                         bg_color=st.session_state['bg_color'],
-    #                         gauge_name=st.session_state['gauge_name'],
-    #                         show_name=st.session_state['show_name'],
-    #                         show_value=st.session_state['show_value'],
-    #                         image_format="png",
-    #                         linear_thickness_pixels=st.session_state['linear_thickness'],
-    #                         orientation=st.session_state['linear_orientation'],
-    #                         num_segments=st.session_state['linear_num_segments'],
-    #                         segment_gap_pixels=st.session_state['linear_segment_gap_pixels'],
-    #                         tip_style=st.session_state['tip_style'],
-    #                         is_3d=st.session_state['is_3d'],
-    #                         gauge_value_color=st.session_state['gauge_value_color'], # Pass value color
-    #                         gauge_name_color=st.session_state['gauge_name_color'] # Pass name color
-    #                     )
-    #                 zipf.writestr(f"{val:02d}_{st.session_state['gauge_type'].lower().replace(' ', '_')}.png", img_buffer.getvalue())
-    #         zip_buffer.seek(0)
-    #         st.download_button(
-    #             label="Click to Download All Gauges ZIP (Matplotlib)",
-    #             data=zip_buffer,
-    #             file_name="all_matplotlib_gauge_images.zip",
-    #             mime="application/zip",
-    #             key="final_all_matplotlib_download_button"
-    #         )
-    #         st.success("All Matplotlib gauge images generated and ready for download!")
+        if st.button("Generate and Download All Gauge Images (0-99) (Python)", key="download_all_python_gauges_button"):
+            with st.spinner("Generating gauge images... This may take a moment."):
+                if python_renderer == "pillow":
+                    render_batch = partial(create_gauge_frames_pil, **round_gauge_kwargs)
+                else:
+                    render_batch = partial(render_values, GaugeParams(**round_gauge_kwargs))
+                zip_buffer = create_gauge_zip(
+                    render_batch,
+                    st.session_state['gauge_type'].lower().replace(' ', '_'),
+                    round_gauge_kwargs['image_format']
+                )
+            st.download_button(
+                label="Click to Download All Gauges ZIP (Python)",
+                data=zip_buffer,
+                file_name="all_python_gauge_images.zip",
+                mime="application/zip",
+                key="final_all_python_download_button"
+            )
+            st.success("All gauge images generated and ready for download!")
 
 with selected_tab_title_obj[1]: # ICL Optimizer Tab
     st.title("ICL File Address Planner")
@@ -1555,61 +2735,50 @@ with selected_tab_title_obj[1]: # ICL Optimizer Tab
             except ValueError:
                 return 0
 
-        sorted_files = sorted(files, key=lambda f: extract_block_from_filename(f.name))
+        # Each filename is parsed once; the allocation check reuses the start blocks
+        files_by_block = sorted(((extract_block_from_filename(f.name), f) for f in files), key=lambda item: item[0])
+        sorted_files = [f for _, f in files_by_block]
 
         n_blocks = end_block - start_block + 1
         if n_blocks <= 0:
             st.error("Error: End Block must be greater than or equal to Start Block.")
             st.stop()
         
-        block_states = np.zeros(n_blocks, dtype=int) 
+        block_states = np.zeros(n_blocks, dtype=np.uint8)  # 0 free, 1 occupied, 2 overlap/out of range
 
         st.write("### Original Address Allocation Check")
 
-        for file in sorted_files:
+        for start_from_filename, file in files_by_block:
             filename = file.name
-            file.seek(0)
-            size_bytes = len(file.read())
-            file.seek(0)
+            size_bytes = file.size  # Known from the upload, no need to read the file
 
             blocks_needed = int(np.ceil(size_bytes / block_size))
-            start_from_filename = extract_block_from_filename(filename)
             end_from_filename = start_from_filename + blocks_needed - 1
 
-            overlap_current_file = False
-            
-            if start_from_filename < start_block or end_from_filename > end_block:
-                overlap_current_file = True
+            # Blocks of this file inside the planned range, as a view into block_states
+            lo = max(0, start_from_filename - start_block)
+            hi = min(n_blocks - 1, end_from_filename - start_block)
+            file_blocks = block_states[lo:hi + 1] if lo <= hi else block_states[:0]
+
+            overlap_current_file = (
+                start_from_filename < start_block
+                or end_from_filename > end_block
+                or bool((file_blocks == 1).any())
+            )
+            if overlap_current_file:
                 overlaps.append(filename)
-                
-            if not overlap_current_file:
-                for blk in range(start_from_filename, end_from_filename + 1):
-                    idx = blk - start_block
-                    if idx >= 0 and idx < n_blocks:
-                        if block_states[idx] == 1:
-                            overlap_current_file = True
-                            if filename not in overlaps:
-                                overlaps.append(filename)
-                            break
-                    else:
-                        pass
-            
-            for blk in range(start_from_filename, end_from_filename + 1):
-                idx = blk - start_block
-                if idx >= 0 and idx < n_blocks:
-                    if overlap_current_file:
-                        block_states[idx] = 2
-                    elif block_states[idx] == 0:
-                        block_states[idx] = 1
-                
-                allocation.append({
-                    "File": filename,
-                    "Size KB": round(size_bytes / 1024, 1),
-                    "Blocks": blocks_needed,
-                    "Original Start": start_from_filename,
-                    "Original End": end_from_filename,
-                    "Status": "Overlap/Out of Range" if overlap_current_file else "Valid"
-                })
+                file_blocks[:] = 2
+            else:
+                file_blocks[file_blocks == 0] = 1
+
+            allocation.append({
+                "File": filename,
+                "Size KB": round(size_bytes / 1024, 1),
+                "Blocks": blocks_needed,
+                "Original Start": start_from_filename,
+                "Original End": end_from_filename,
+                "Status": "Overlap/Out of Range" if overlap_current_file else "Valid"
+            })
 
         st.dataframe(allocation)
 
@@ -1621,27 +2790,17 @@ with selected_tab_title_obj[1]: # ICL Optimizer Tab
         st.write("## Optimized (Non-Overlapping) Packing Proposal")
 
         proposal = []
-        used_blocks_opt = set()
-        cur_block = start_block
+        next_free = start_block  # Files are packed forward, so everything before this block is taken
         file_map = {}
 
         for file in sorted_files:
-            file.seek(0)
-            size_bytes = len(file.read())
-            file.seek(0)
+            size_bytes = file.size
             blocks_needed = int(np.ceil(size_bytes / block_size))
 
-            while any(b in used_blocks_opt for b in range(cur_block, cur_block + blocks_needed)):
-                cur_block += 1
-                if cur_block + blocks_needed - 1 > end_block:
-                    break
-
-            new_start = cur_block
+            new_start = next_free
             new_end = new_start + blocks_needed - 1
 
             if new_end <= end_block:
-                used_blocks_opt.update(range(new_start, new_end + 1))
-                
                 original_name_parts = file.name.split('_', 1)
                 if len(original_name_parts) > 1:
                     new_filename = f"{new_start:02d}_{original_name_parts[1]}" 
@@ -1658,7 +2817,7 @@ with selected_tab_title_obj[1]: # ICL Optimizer Tab
                     "New Filename": new_filename
                 })
                 file_map[file.name] = new_filename
-                cur_block = new_end + 1
+                next_free = new_end + 1
             else:
                 proposal.append({
                     "File": file.name,
@@ -1676,12 +2835,14 @@ with selected_tab_title_obj[1]: # ICL Optimizer Tab
         if any(item["Proposed Start"] != "-" for item in proposal):
             if st.button("Download Renamed ZIP"):
                 zip_buffer_download = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer_download, "w", zipfile.ZIP_DEFLATE, False) as zipf:
+                # ICL files hold JPEG-compressed images, so they are stored without recompressing
+                with zipfile.ZipFile(zip_buffer_download, "w", zipfile.ZIP_STORED, False) as zipf:
                     for file in sorted_files:
                         if file.name in file_map:
                             newname = file_map[file.name]
                             file.seek(0)
-                            zipf.writestr(newname, file.read())
+                            with zipf.open(newname, "w") as zip_entry:
+                                shutil.copyfileobj(file, zip_entry, length=1 << 20)  # 1 MiB at a time
                 
                 zip_buffer_download.seek(0)
                 st.download_button(
@@ -1695,25 +2856,7 @@ with selected_tab_title_obj[1]: # ICL Optimizer Tab
 
         st.write("### Block Allocation Map")
         
-        fig, ax = plt.subplots(figsize=(10, 3))
-
-        colors = {0: 'lightgray', 1: 'dodgerblue', 2: 'crimson'}
-        labels = {0: 'Free', 1: 'Occupied', 2: 'Overlap/Out of Range'}
-
-        for blk_idx in range(n_blocks):
-            block_num = start_block + blk_idx
-            ax.barh(0, 1, left=block_num, color=colors[block_states[blk_idx]], edgecolor='k', height=0.8)
-
-        ax.set_xlim(start_block, end_block + 1)
-        ax.set_xlabel("Flash Block Number")
-        ax.set_yticks([])
-        ax.set_title("Memory Block Allocation (Red=Overlap/Out of Range, Blue=Occupied, Gray=Free)")
-
-        patches = [plt.Rectangle((0, 0), 1, 1, fc=colors[key], edgecolor='k') for key in sorted(colors.keys())]
-        ax.legend(patches, [labels[key] for key in sorted(colors.keys())], bbox_to_anchor=(1.05, 1), loc='upper left')
-
-        st.pyplot(fig)
-        plt.close(fig)
+        st.markdown(_block_map_svg(block_states.tobytes(), start_block, n_blocks), unsafe_allow_html=True)
 
 
 # Custom CSS for better appearance (optional, but good practice)